@@ -7,9 +7,18 @@
 
 import os
 import re
+import json
 import datetime as dt
+import multiprocessing
+import time
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from io import StringIO
+from itertools import repeat
 from pathlib import Path
-from typing import Iterable, Tuple, Optional, List
+from typing import Dict, Iterable, Tuple, Optional, List
 
 import numpy as np
 import pandas as pd
@@ -17,9 +26,66 @@ import netCDF4 as nc
 from dotenv import load_dotenv
 import earthaccess
 
+# ===== PyArrow (opcional: escrita de CSV em C++ multithread / Parquet) =====
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except Exception:
+    pa = None
+    pacsv = None
+
+# ===== h5netcdf (opcional: abre os L3m direto via h5py, mais rápido que o netCDF4-C) =====
+# Não decodifica _FillValue/valid_*/scale_factor sozinho → _read_float faz isso à mão.
+try:
+    import h5netcdf.legacyapi as h5nc
+except Exception:
+    h5nc = None
+
+# ===== Numba (opcional: máscara + compactação dos pixels válidos numa passada só) =====
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _pack_valid_nb(block, lat_rows, lon_cols):
+        """(lat, lon, valor) dos pixels finitos do bloco, linha a linha: conta, aloca o exato e copia."""
+        n = 0
+        for i in range(block.shape[0]):
+            for j in range(block.shape[1]):
+                if np.isfinite(block[i, j]):
+                    n += 1
+        out_lat = np.empty(n, dtype=lat_rows.dtype)
+        out_lon = np.empty(n, dtype=lon_cols.dtype)
+        out_val = np.empty(n, dtype=block.dtype)
+        k = 0
+        for i in range(block.shape[0]):
+            for j in range(block.shape[1]):
+                v = block[i, j]
+                if np.isfinite(v):
+                    out_lat[k] = lat_rows[i]
+                    out_lon[k] = lon_cols[j]
+                    out_val[k] = v
+                    k += 1
+        return out_lat, out_lon, out_val
+
+
+def _pack_valid(block: np.ndarray, lat_rows: np.ndarray, lon_cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (lat, lon, valor) dos pixels finitos do bloco 2D, na ordem de np.nonzero.
+    Com numba: sem máscara booleana nem arrays de índices intermediários do tamanho do bloco.
+    """
+    if njit is None:
+        rows, cols = np.nonzero(np.isfinite(block))
+        return lat_rows[rows], lon_cols[cols], block[rows, cols]
+    return _pack_valid_nb(block, lat_rows, lon_cols)
+
+
 # ===== H3 (suporta API v3 e v4) =====
 try:
     import h3  # v3 (geo_to_h3/h3_to_geo) ou v4 (latlng_to_cell/cell_to_latlng)
+    import h3.api.numpy_int as h3i  # mesma API, mas com células uint64 (sem strings)
     _H3_V4 = hasattr(h3, "latlng_to_cell")
     def _latlng_to_h3(lat, lon, res):
         return h3.latlng_to_cell(lat, lon, res) if _H3_V4 else h3.geo_to_h3(lat, lon, res)
@@ -27,12 +93,57 @@ try:
         return h3.cell_to_latlng(cell) if _H3_V4 else h3.h3_to_geo(cell)
 except Exception as _e:
     h3 = None
+    h3i = None
     _H3_V4 = False
     def _latlng_to_h3(*args, **kwargs):
         raise ImportError("Pacote 'h3' não instalado. Rode: pip install 'h3>=3,<4' ou 'h3'")
     def _h3_to_latlng(*args, **kwargs):
         raise ImportError("Pacote 'h3' não instalado. Rode: pip install 'h3>=3,<4' ou 'h3'")
 
+# ===== H3 vetorizado (opcional: h3ronpy, em Rust e multithread) =====
+try:
+    try:
+        from h3ronpy.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+    except ImportError:  # h3ronpy < 0.21
+        from h3ronpy.arrow.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+except Exception:
+    _h3r_to_cells = None
+    _h3r_to_coords = None
+
+
+def _latlng_to_h3_array(lats: np.ndarray, lons: np.ndarray, res: int) -> np.ndarray:
+    """Indexa arrays de lat/lon em células H3 (uint64) de uma vez só."""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if _h3r_to_cells is not None:
+        return np.asarray(_h3r_to_cells(lats, lons, res), dtype=np.uint64)
+    # sem h3ronpy: ainda ponto a ponto, mas via numpy_int (sem criar strings/listas)
+    fn = h3i.latlng_to_cell if _H3_V4 else h3i.geo_to_h3
+    return np.fromiter(map(fn, lats.tolist(), lons.tolist(), repeat(res, lats.size)), dtype=np.uint64, count=lats.size)
+
+
+def _h3_to_latlng_array(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Centróides (lat, lon) de um array de células H3 uint64."""
+    cells = np.ascontiguousarray(cells, dtype=np.uint64)
+    if _h3r_to_coords is not None:
+        coords = _h3r_to_coords(cells)
+        return np.asarray(coords["lat"], dtype=np.float64), np.asarray(coords["lng"], dtype=np.float64)
+    fn = h3i.cell_to_latlng if _H3_V4 else h3i.h3_to_geo
+    latlng = np.array([fn(c) for c in cells.tolist()], dtype=np.float64).reshape(-1, 2)
+    return latlng[:, 0], latlng[:, 1]
+
+
+def _h3_to_str_array(cells: np.ndarray) -> np.ndarray:
+    """uint64 → hex (mesmo formato de h3.int_to_str / h3.h3_to_string) para o CSV."""
+    return np.array([format(c, "x") for c in np.asarray(cells, dtype=np.uint64).tolist()], dtype=object)
+
+
+def _h3_output(cells: np.ndarray) -> np.ndarray:
+    """Coluna h3 de saída conforme H3_ID_FORMAT (uint64 sai direto, sem virar string)."""
+    if H3_ID_FORMAT == "uint64":
+        return np.asarray(cells, dtype=np.uint64)
+    return _h3_to_str_array(cells)
+
 # =========================
 # CONFIGURAÇÕES
 # =========================
@@ -55,6 +166,28 @@ DOWNSAMPLE = 1
 H3_RESOLUTION = 5
 H3_AGGREGATE = True  # agrega por hex (gera média/min/máx/std/contagem + centróides)
 
+# Leitura do NetCDF em blocos de linhas (latitudes) para limitar o pico de memória
+# (arredondado para múltiplo do chunk HDF5 da variável, ver _block_rows).
+CHUNK_ROWS = 512
+
+# Formato de saída: "csv" (lido pelo viewer web) ou "parquet" (zstd, menor e mais rápido)
+OUTPUT_FORMAT = "csv"
+OUTPUT_EXT = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+# Coluna h3: "hex" (string, formato que o viewer web lê) ou "uint64" (inteiro: arquivo menor, join mais rápido)
+H3_ID_FORMAT = "hex"
+
+# Processos usados para gerar os CSVs de um mês em paralelo (1 = serial)
+MAX_WORKERS = os.cpu_count() or 1
+# Meses buscados/baixados ao mesmo tempo (I/O de rede); poucos, por etiqueta com o DAAC da NASA
+MONTH_WORKERS = 3
+# Downloads simultâneos por mês dentro do earthaccess.download
+DOWNLOAD_THREADS = 8
+# Processos dos pools: forkserver/spawn, não fork — o pool é iniciado com threads de busca/download
+# em andamento e um fork herdaria os locks delas (SSL, urllib3, stdout) no meio do uso
+MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
 
 # =========================
 # LOGIN
@@ -71,8 +204,6 @@ def authenticate() -> bool:
 
     print("🔐 Autenticando no Earthdata...")
     try:
-        from contextlib import redirect_stdout, redirect_stderr
-        from io import StringIO
         # suprime logs verbosos do earthaccess
         with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
             auth = earthaccess.login(strategy="environment")
@@ -100,8 +231,280 @@ def month_windows(start: dt.date, end: dt.date) -> Iterable[Tuple[dt.date, dt.da
         cur = nxt
 
 def month_windows_desc(start: dt.date, end: dt.date) -> Iterable[Tuple[dt.date, dt.date]]:
-    """Gera janelas mensais em ordem decrescente (mais recente -> mais antigo)."""
-    return reversed(list(month_windows(start, end)))
+    """Gera janelas mensais em ordem decrescente (mais recente -> mais antigo), sem montar lista."""
+    cur = dt.date(end.year, end.month, 1)
+    first = dt.date(start.year, start.month, 1)
+    while cur >= first:
+        nxt = (cur.replace(day=28) + dt.timedelta(days=4)).replace(day=1)  # 1º do mês seguinte
+        yield cur, min(nxt - dt.timedelta(days=1), end)
+        cur = (cur - dt.timedelta(days=1)).replace(day=1)  # 1º do mês anterior
+
+
+# =========================
+# AGREGAÇÃO H3 INCREMENTAL
+# =========================
+def _group_runs(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ordena por célula uma única vez → (ordem, células únicas, início de cada grupo, tamanho do grupo)."""
+    order = np.argsort(cells, kind="stable")
+    cells_s = cells[order]
+    starts = np.flatnonzero(np.r_[True, cells_s[1:] != cells_s[:-1]]) if cells_s.size else np.array([], dtype=np.intp)
+    sizes = np.diff(np.append(starts, cells_s.size))
+    return order, cells_s[starts], starts, sizes
+
+
+def _h3_partial_stats(cells: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Estatísticas parciais de um bloco por hex: n, média, M2 (Welford), mín, máx."""
+    order, keys, starts, n = _group_runs(cells)
+    v = values[order].astype(np.float64)
+    mean = np.add.reduceat(v, starts) / n
+    return {
+        "h3": keys,
+        "n": n,
+        "mean": mean,
+        "m2": np.add.reduceat((v - np.repeat(mean, n)) ** 2, starts),
+        "min": np.minimum.reduceat(v, starts),
+        "max": np.maximum.reduceat(v, starts),
+    }
+
+
+def _merge_h3_stats(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Combina as parciais de todos os blocos (fórmula paralela de Chan) → n, mean, std, min, max."""
+    if not parts:
+        empty = np.array([], dtype=np.float64)
+        return {"h3": np.array([], dtype=np.uint64), "n": np.array([], dtype=np.int64),
+                "mean": empty, "std": empty, "min": empty, "max": empty}
+    allp = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    order, keys, starts, sizes = _group_runs(allp["h3"])
+    n_k, mean_k, m2_k = allp["n"][order], allp["mean"][order], allp["m2"][order]
+    n = np.add.reduceat(n_k, starts)
+    mean = np.add.reduceat(n_k * mean_k, starts) / n
+    m2 = np.add.reduceat(m2_k + n_k * (mean_k - np.repeat(mean, sizes)) ** 2, starts)
+    # desvio amostral (ddof=1), como o pandas: NaN quando o hex tem um único ponto
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+    return {
+        "h3": keys,
+        "n": n,
+        "mean": mean,
+        "std": std,
+        "min": np.minimum.reduceat(allp["min"][order], starts),
+        "max": np.maximum.reduceat(allp["max"][order], starts),
+    }
+
+
+# =========================
+# LEITURA NetCDF (netCDF4 ou h5netcdf)
+# =========================
+def _open_nc(filepath: str):
+    """Abre com h5netcdf quando instalado; cai no netCDF4 se faltar ou se o arquivo não for HDF5."""
+    if h5nc is not None:
+        try:
+            return h5nc.Dataset(filepath, "r")
+        except Exception:
+            pass
+    ds = nc.Dataset(filepath)
+    ds.set_auto_maskandscale(False)  # sem MaskedArray; fill/escala tratados em _read_float
+    return ds
+
+
+def _read_float(var, idx=slice(None), dtype=np.float64) -> np.ndarray:
+    """
+    Lê var[idx] como float com NaN nos pixels inválidos, sem np.ma.
+    Os dois backends entregam o valor bruto (no netCDF4 via set_auto_maskandscale(False)):
+    o _FillValue/valid_* é comparado no valor bruto e só depois aplicamos a escala.
+    """
+    raw = np.asarray(var[idx])
+    attrs = set(var.ncattrs())
+    bad = np.zeros(raw.shape, dtype=bool)
+    for name in ("_FillValue", "missing_value"):
+        if name in attrs:
+            bad |= np.isin(raw, np.atleast_1d(var.getncattr(name)))
+    if "valid_range" in attrs:
+        vmin, vmax = var.getncattr("valid_range")
+        bad |= (raw < vmin) | (raw > vmax)
+    if "valid_min" in attrs:
+        bad |= raw < var.getncattr("valid_min")
+    if "valid_max" in attrs:
+        bad |= raw > var.getncattr("valid_max")
+
+    out = raw.astype(dtype)
+    if "scale_factor" in attrs:
+        out *= dtype(var.getncattr("scale_factor"))
+    if "add_offset" in attrs:
+        out += dtype(var.getncattr("add_offset"))
+    out[bad] = np.nan
+    return out
+
+
+def _block_rows(var, lat_axis: int) -> int:
+    """
+    CHUNK_ROWS arredondado para múltiplo do chunk HDF5 no eixo da latitude:
+    nenhum chunk fica dividido entre dois blocos (cada um é descomprimido uma vez só).
+    """
+    try:
+        chunks = var.chunking()
+    except Exception:
+        return CHUNK_ROWS
+    if isinstance(chunks, str) or not chunks:  # "contiguous"
+        return CHUNK_ROWS
+    c = int(chunks[lat_axis])
+    return -(-CHUNK_ROWS // c) * c
+
+
+# =========================
+# ESCRITA (CSV / Parquet)
+# =========================
+def _write_table(df: pd.DataFrame, path: str) -> str:
+    """
+    Grava o DataFrame conforme OUTPUT_FORMAT e retorna o caminho final.
+    CSV usa o writer C++ do pyarrow quando disponível (senão, df.to_csv).
+    """
+    if OUTPUT_FORMAT == "parquet":
+        path = os.path.splitext(path)[0] + ".parquet"
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    elif pa is not None:
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+# =========================
+# MANIFESTO (arquivos já processados)
+# =========================
+MANIFEST_NAME = "_manifest.jsonl"
+_MANIFEST_LOCK = threading.Lock()  # vários meses podem registrar ao mesmo tempo
+# Cache das buscas ao CMR (nomes dos arquivos por mês), para pular meses já prontos em reexecuções
+SEARCH_CACHE_NAME = "_search_cache.json"
+SEARCH_CACHE_TTL = 24 * 3600        # meses fechados
+SEARCH_CACHE_TTL_RECENT = 3600      # mês corrente (NRT)
+
+
+def load_manifest(csv_dir: Path) -> Dict[Tuple[str, int], str]:
+    """
+    Lê csv_dir/_manifest.jsonl → {(nome_do_nc, h3_res): caminho_da_saida}.
+    Só entram saídas que ainda existem em disco (apagou o CSV → reprocessa).
+    """
+    processed: Dict[Tuple[str, int], str] = {}
+    path = csv_dir / MANIFEST_NAME
+    if not path.exists():
+        return processed
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+                if Path(rec["csv"]).exists():
+                    processed[(Path(rec["nc"]).name, rec["h3_res"])] = rec["csv"]
+            except (ValueError, KeyError, TypeError):
+                continue  # linha corrompida/truncada: ignora
+    return processed
+
+
+def append_manifest(csv_dir: Path, nc_path: Path, out_path: str) -> None:
+    """Registra no manifesto um NetCDF já convertido."""
+    rec = {
+        "nc": str(nc_path),
+        "csv": str(out_path),
+        "h3_res": H3_RESOLUTION,
+        "mtime": nc_path.stat().st_mtime if nc_path.exists() else None,
+    }
+    with _MANIFEST_LOCK, open(csv_dir / MANIFEST_NAME, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(rec) + "\n")
+
+
+def _granule_filenames(granule) -> List[str]:
+    """Nomes dos arquivos de um resultado do earthaccess (vazio se não der para saber)."""
+    try:
+        return [os.path.basename(u) for u in granule.data_links()]
+    except Exception:
+        return []
+
+
+def _search_key(params: dict) -> str:
+    return json.dumps([params["short_name"], params["granule_name"], list(params["temporal"])])
+
+
+def load_cached_search(csv_dir: Path, params: dict, mend: dt.date) -> Optional[List[str]]:
+    """
+    Nomes dos arquivos de uma busca ao CMR feita há pouco (csv_dir/_search_cache.json), ou None.
+    Validade: SEARCH_CACHE_TTL_RECENT para o mês corrente (granules NRT ainda chegando),
+    SEARCH_CACHE_TTL para meses fechados.
+    """
+    path = csv_dir / SEARCH_CACHE_NAME
+    try:
+        with _MANIFEST_LOCK, open(path, encoding="utf-8") as fh:
+            rec = json.load(fh).get(_search_key(params))
+    except (OSError, ValueError):
+        return None
+    if not rec:
+        return None
+    ttl = SEARCH_CACHE_TTL_RECENT if mend >= dt.date.today().replace(day=1) else SEARCH_CACHE_TTL
+    if time.time() - rec.get("t", 0) > ttl:
+        return None
+    return rec.get("names")
+
+
+def store_cached_search(csv_dir: Path, params: dict, names: List[str]) -> None:
+    """Guarda os nomes dos arquivos retornados pela busca (com horário, para o TTL)."""
+    path = csv_dir / SEARCH_CACHE_NAME
+    with _MANIFEST_LOCK:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                cache = json.load(fh)
+        except (OSError, ValueError):
+            cache = {}
+        cache[_search_key(params)] = {"t": time.time(), "names": names}
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(cache, fh)
+
+
+# =========================
+# DATA DO PRODUTO
+# =========================
+# Nome do arquivo já traz a data: AQUA_MODIS.20241101_20241130.L3m... (atual) ou A2024306... (antigo)
+_DATE_RE = re.compile(r"\.(\d{8})[._]")
+_DATE_DOY_RE = re.compile(r"A(\d{7})")
+
+
+# Atributo sem hora: formato escolhido pelo tamanho da string (YYYYMMDD / YYYY-MM-DD)
+_DATE_ATTR_PARSERS = {
+    8: lambda s: dt.datetime.strptime(s, "%Y%m%d").strftime("%Y-%m-%d"),
+    10: lambda s: dt.date.fromisoformat(s).isoformat(),
+}
+
+
+def _parse_date_attr(s) -> Optional[str]:
+    """Atributo de data do NetCDF → YYYY-MM-DD; None se vazio ou não reconhecido."""
+    if not s:
+        return None
+    try:
+        if "T" in s:
+            return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+        parse = _DATE_ATTR_PARSERS.get(len(s))
+        return parse(s) if parse else None
+    except Exception:
+        return None
+
+
+def _infer_date_string(filepath: str, ds) -> str:
+    """Data (YYYY-MM-DD) do produto: tenta o nome do arquivo; só lê atributos do NetCDF se falhar."""
+    fname = os.path.basename(filepath)
+    m = _DATE_RE.search(fname)
+    if m:
+        try:
+            return dt.datetime.strptime(m.group(1), "%Y%m%d").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    m = _DATE_DOY_RE.search(fname)
+    if m:
+        year = int(m.group(1)[:4]); doy = int(m.group(1)[4:])
+        d = dt.datetime(year, 1, 1) + dt.timedelta(days=doy - 1)
+        return d.strftime("%Y-%m-%d")
+    for attr in ("time_coverage_start", "start_time", "time_coverage_end", "end_time", "date_created"):
+        d = _parse_date_attr(getattr(ds, attr, None))
+        if d:
+            return d
+    return "data_nao_encontrada"
 
 
 # =========================
@@ -123,129 +526,144 @@ def export_csv(
     Caso contrário, salva ponto a ponto (latitude, longitude, chlor_a, ...).
     """
     print(f"📝 Gerando CSV para {filepath}...")
-    with nc.Dataset(filepath) as ds:
+    with _open_nc(filepath) as ds:
         lat_var = "lat" if "lat" in ds.variables else ("latitude" if "latitude" in ds.variables else None)
         lon_var = "lon" if "lon" in ds.variables else ("longitude" if "longitude" in ds.variables else None)
         if not lat_var or not lon_var:
             raise KeyError("Variáveis 'lat'/'lon' não encontradas no NetCDF.")
 
-        lats = ds.variables[lat_var][:]
-        lons = ds.variables[lon_var][:]
+        lats = _read_float(ds.variables[lat_var]).ravel()
+        lons = _read_float(ds.variables[lon_var]).ravel()
 
         if "chlor_a" not in ds.variables:
             raise KeyError("Variável 'chlor_a' não encontrada.")
-        chl = np.squeeze(ds.variables["chlor_a"][:])
-        chl = np.ma.filled(chl, np.nan)
+        chl_var = ds.variables["chlor_a"]
 
         # Data do produto
-        def _infer_date_string() -> str:
-            for attr in ("time_coverage_start", "start_time", "time_coverage_end", "end_time"):
-                if hasattr(ds, attr):
-                    s = getattr(ds, attr)
-                    if s:
-                        try:
-                            if "T" in s:
-                                return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                            if len(s) == 8 and s.isdigit():
-                                return dt.datetime.strptime(s, "%Y%m%d").strftime("%Y-%m-%d")
-                        except Exception:
-                            pass
-            fname = os.path.basename(filepath)
-            m = re.search(r"A(\d{7})", fname)
-            if m:
-                year = int(m.group(1)[:4]); doy = int(m.group(1)[4:])
-                d = dt.datetime(year, 1, 1) + dt.timedelta(days=doy - 1)
-                return d.strftime("%Y-%m-%d")
-            if hasattr(ds, "date_created"):
-                try:
-                    s = getattr(ds, "date_created")
-                    if "T" in s:
-                        return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                except Exception:
-                    pass
-            return "data_nao_encontrada"
-
-        data_formatada = _infer_date_string()
-
-        # Estatísticas globais
-        chlor_a_min = float(np.nanmin(chl))
-        chlor_a_max = float(np.nanmax(chl))
+        data_formatada = _infer_date_string(filepath, ds)
+
         lat_range: Tuple[float, float] = (float(np.nanmin(lats)), float(np.nanmax(lats)))
         lon_range: Tuple[float, float] = (float(np.nanmin(lons)), float(np.nanmax(lons)))
         date_created = getattr(ds, "date_created", data_formatada)
 
-        # Grade
-        lon_grid, lat_grid = np.meshgrid(lons, lats)
-        if chl.ndim != 2:
-            raise ValueError(f"'chlor_a' com {chl.ndim} dimensões; esperado 2D.")
-        if chl.shape != lat_grid.shape:
-            if chl.T.shape == lat_grid.shape:
-                chl = chl.T
+        # Grade (lat x lon) — sem meshgrid: indexamos os vetores 1D pelos pixels válidos.
+        # Descobre qual eixo da variável é a latitude (ignorando eixos unitários, ex.: time=1).
+        nlat, nlon = lats.size, lons.size
+        axes = [i for i, n in enumerate(chl_var.shape) if n != 1]
+        if len(axes) != 2:
+            raise ValueError(f"'chlor_a' com {len(axes)} dimensões; esperado 2D.")
+        shape2d = tuple(chl_var.shape[i] for i in axes)
+        if shape2d == (nlat, nlon):
+            lat_axis, lon_axis, transposed = axes[0], axes[1], False
+        elif shape2d == (nlon, nlat):
+            lat_axis, lon_axis, transposed = axes[1], axes[0], True
+        else:
+            raise ValueError(f"Dimensões de 'chlor_a' {shape2d} != grade {(nlat, nlon)}.")
+
+        if h3_resolution is not None and h3 is None:
+            raise ImportError("O pacote 'h3' não está instalado. Rode: pip install 'h3>=3,<4'")
+        aggregate = h3_resolution is not None and h3_aggregate
+
+        # ponto a ponto com downsample: o passo vai direto na leitura (lat e lon),
+        # então NaN/H3 só veem a grade reduzida; a agregação H3 usa todos os pixels
+        step = downsample if (not aggregate and downsample and downsample > 1) else 1
+        ncols = len(range(0, nlon, step))
+
+        # Leitura em blocos de CHUNK_ROWS latitudes: máscara NaN + H3 + agregação parcial por bloco
+        chlor_a_min, chlor_a_max = np.inf, -np.inf
+        parts: List[Dict[str, np.ndarray]] = []
+        pts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        block_rows = _block_rows(chl_var, lat_axis)
+        lon_grid = np.ascontiguousarray(lons[::step])
+        for i0 in range(0, nlat, block_rows):
+            i1 = min(i0 + block_rows, nlat)
+            r0 = i0 + (-i0) % step  # primeira linha do bloco que cai no passo global
+            nrows = len(range(r0, i1, step))
+            if nrows == 0:
+                continue
+            idx = [slice(None)] * chl_var.ndim
+            idx[lat_axis] = slice(r0, i1, step)
+            idx[lon_axis] = slice(None, None, step)
+            # float32 até a redução (precisão do chlor_a sobra); só as somas por hex vão a float64
+            block = _read_float(chl_var, tuple(idx), np.float32)
+            block = block.reshape(ncols, nrows).T if transposed else block.reshape(nrows, ncols)
+
+            # só pixels válidos (terra/nuvem = NaN ficam de fora)
+            lat_v, lon_v, chl_v = _pack_valid(block, lats[r0:i1:step], lon_grid)
+            if chl_v.size == 0:
+                continue
+            chlor_a_min = min(chlor_a_min, float(chl_v.min()))
+            chlor_a_max = max(chlor_a_max, float(chl_v.max()))
+
+            if aggregate:
+                parts.append(_h3_partial_stats(_latlng_to_h3_array(lat_v, lon_v, h3_resolution), chl_v))
             else:
-                raise ValueError(f"Dimensões de 'chlor_a' {chl.shape} != grade {lat_grid.shape}.")
+                pts.append((lat_v, lon_v, chl_v))
+
+        if chlor_a_min > chlor_a_max:  # nenhum pixel válido
+            chlor_a_min = chlor_a_max = float("nan")
 
+    if not aggregate:
         # DataFrame base (ponto-a-ponto)
         df = pd.DataFrame(
             {
-                "latitude": lat_grid.ravel(),
-                "longitude": lon_grid.ravel(),
-                "chlor_a": chl.ravel(),
-                "data": [data_formatada] * lat_grid.size,
-                "chlor_a_min": [chlor_a_min] * lat_grid.size,
-                "chlor_a_max": [chlor_a_max] * lat_grid.size,
-                "lat_range": [lat_range] * lat_grid.size,
-                "lon_range": [lon_range] * lat_grid.size,
-                "date_created": [date_created] * lat_grid.size,
+                "latitude": np.concatenate([p[0] for p in pts]) if pts else np.array([], dtype=lats.dtype),
+                "longitude": np.concatenate([p[1] for p in pts]) if pts else np.array([], dtype=lons.dtype),
+                "chlor_a": np.concatenate([p[2] for p in pts]) if pts else np.array([], dtype=np.float32),
             }
-        ).dropna(subset=["chlor_a"])
+        )
+
+    def _add_point_metadata(frame: pd.DataFrame) -> pd.DataFrame:
+        # metadados constantes entram só depois de filtrar (evita N cópias por pixel)
+        frame = frame.copy()
+        frame["data"] = data_formatada
+        frame["chlor_a_min"] = chlor_a_min
+        frame["chlor_a_max"] = chlor_a_max
+        frame["lat_range"] = str(lat_range)
+        frame["lon_range"] = str(lon_range)
+        frame["date_created"] = date_created
+        return frame
 
     # H3
-    if h3_resolution is not None:
-        if h3 is None:
-            raise ImportError("O pacote 'h3' não está instalado. Rode: pip install 'h3>=3,<4'")
-
-        # mapeia para o hex
-        df["h3"] = [
-            _latlng_to_h3(lat, lon, h3_resolution) for lat, lon in zip(df["latitude"].values, df["longitude"].values)
-        ]
-
-        if h3_aggregate:
-            # agrega por hex
-            agg = df.groupby("h3", as_index=False).agg(
-                chlor_a_mean=("chlor_a", "mean"),
-                chlor_a_min=("chlor_a", "min"),
-                chlor_a_max=("chlor_a", "max"),
-                chlor_a_std=("chlor_a", "std"),
-                n=("chlor_a", "count"),
-            )
-            # centroides dos hexes
-            centroids = [_h3_to_latlng(cell) for cell in agg["h3"].values]
-            agg["centroid_lat"] = [c[0] for c in centroids]
-            agg["centroid_lon"] = [c[1] for c in centroids]
-
-            # adiciona metadados constantes
-            agg["data"] = data_formatada
-            agg["date_created"] = date_created
-            agg["lat_range"] = [lat_range] * len(agg)
-            agg["lon_range"] = [lon_range] * len(agg)
-
-            df = agg
-        else:
-            # só adiciona coluna h3 (sem agregação)
-            if downsample and downsample > 1:
-                df = df.iloc[::downsample, :]
+    if aggregate:
+        stats = _merge_h3_stats(parts)
+        agg = pd.DataFrame(
+            {
+                "h3": stats["h3"],
+                "chlor_a_mean": stats["mean"],
+                "chlor_a_min": stats["min"],
+                "chlor_a_max": stats["max"],
+                "chlor_a_std": stats["std"],
+                "n": stats["n"],
+            }
+        )
+        # centroides dos hexes
+        agg["centroid_lat"], agg["centroid_lon"] = _h3_to_latlng_array(agg["h3"].to_numpy())
+        agg["h3"] = _h3_output(agg["h3"].to_numpy())
+
+        # adiciona metadados constantes
+        agg["data"] = data_formatada
+        agg["date_created"] = date_created
+        agg["lat_range"] = str(lat_range)
+        agg["lon_range"] = str(lon_range)
+
+        df = agg
+    elif h3_resolution is not None:
+        # só adiciona coluna h3 (sem agregação); o downsample já veio da leitura
+        cells = _latlng_to_h3_array(df["latitude"].to_numpy(), df["longitude"].to_numpy(), h3_resolution)
+        df = _add_point_metadata(df)
+        df["h3"] = _h3_output(cells)
     else:
-        # Sem H3, aplica downsample se solicitado
-        if downsample and downsample > 1:
-            df = df.iloc[::downsample, :]
+        # Sem H3 (downsample já aplicado na leitura)
+        df = _add_point_metadata(df)
 
     # Salvar CSV
     if output_csv_path is None:
-        suffix = f".h3r{h3_resolution}.csv" if h3_resolution is not None else ".csv"
+        suffix = f".h3r{h3_resolution}{OUTPUT_EXT}" if h3_resolution is not None else OUTPUT_EXT
         output_csv_path = os.path.splitext(filepath)[0] + suffix
 
     Path(output_csv_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_csv_path, index=False)
+    output_csv_path = _write_table(df, output_csv_path)
     print(
         f"✅ CSV salvo: {output_csv_path} | linhas={len(df)} | "
         f"{'H3 res=' + str(h3_resolution) if h3_resolution is not None else 'sem H3'}"
@@ -266,11 +684,12 @@ def search_and_download_month(
     nc_dir: Path,
     csv_dir: Path,
     sort_key: Optional[str] = "-start_date",
+    executor: Optional[Executor] = None,
 ) -> Tuple[int, int]:
     """
     Busca e baixa todos os granules do mês [mstart,mend].
     - Salva .nc em nc_dir
-    - Gera CSV (agregado por H3) em csv_dir
+    - Gera CSV (agregado por H3) em csv_dir, no `executor` recebido (ou num pool próprio)
     Retorna (qtd_nc_baixados, qtd_csv_gerados) do mês.
     """
     params = {
@@ -283,38 +702,82 @@ def search_and_download_month(
     if sort_key:
         params["sort_key"] = sort_key
 
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    processed = load_manifest(csv_dir)
+
+    # busca recente em cache e todos os arquivos dela já convertidos → nem consulta o CMR
+    cached = load_cached_search(csv_dir, params, mend)
+    if cached is not None and all((n, H3_RESOLUTION) in processed for n in cached):
+        print(f"↪️  {mstart} → {mend}: busca em cache, nada novo ({len(cached)} arquivos)")
+        return 0, 0
+
     print(f"🔎 Buscando {short_name} | {mstart} → {mend} | granule='{granule_name}'")
     results = earthaccess.search_data(**params)
     print(f"   ↳ Resultados: {len(results)}")
 
+    names_per_granule = [_granule_filenames(r) for r in results]
+    # só dá para reaproveitar a busca se todo granule tem nome conhecido; resultado vazio nunca
+    # vai para o cache (uma resposta vazia passageira do CMR esconderia o mês até o TTL)
+    if results and all(names_per_granule):
+        store_cached_search(csv_dir, params, [n for names in names_per_granule for n in names])
+
     if not results:
         return 0, 0
 
     nc_dir.mkdir(parents=True, exist_ok=True)
-    csv_dir.mkdir(parents=True, exist_ok=True)
 
-    files = earthaccess.download(results, local_path=str(nc_dir))
+    # granules já convertidos (manifesto) nem são baixados de novo
+    todo = []
+    for r, names in zip(results, names_per_granule):
+        if names and all((n, H3_RESOLUTION) in processed for n in names):
+            continue
+        todo.append(r)
+    if len(todo) < len(results):
+        print(f"↪️  Já processados (manifesto): {len(results) - len(todo)}")
+    if not todo:
+        return 0, 0
+
+    files = earthaccess.download(todo, local_path=str(nc_dir), threads=DOWNLOAD_THREADS)
     print(f"⬇️ Baixados: {len(files)}")
 
-    csv_count = 0
+    pending: List[Tuple[Path, Path]] = []
     for f in (files or []):
         fpath = Path(f)
+        if (fpath.name, H3_RESOLUTION) in processed:
+            continue
         # CSV com marca da resolução H3 p/ diferenciar
-        csv_path = csv_dir / (f"{fpath.stem}.h3r{H3_RESOLUTION}.csv")
+        csv_path = csv_dir / (f"{fpath.stem}.h3r{H3_RESOLUTION}{OUTPUT_EXT}")
         if csv_path.exists():
             print(f"↪️  CSV já existe, pulando: {csv_path.name}")
+            append_manifest(csv_dir, fpath, str(csv_path))
             continue
+        pending.append((fpath, csv_path))
+
+    # cada arquivo é independente (CPU-bound: leitura + H3 + agregação) → um processo por arquivo
+    csv_count = 0
+    if pending:
+        export = partial(
+            export_csv,
+            downsample=DOWNSAMPLE,
+            h3_resolution=H3_RESOLUTION,
+            h3_aggregate=H3_AGGREGATE,
+        )
+        ex = executor or ProcessPoolExecutor(max_workers=min(MAX_WORKERS, len(pending)), mp_context=MP_CONTEXT)
         try:
-            export_csv(
-                str(fpath),
-                downsample=DOWNSAMPLE,
-                output_csv_path=str(csv_path),
-                h3_resolution=H3_RESOLUTION,
-                h3_aggregate=H3_AGGREGATE,
-            )
-            csv_count += 1
-        except Exception as e:
-            print(f"⚠️ Erro ao gerar CSV de {fpath.name}: {e}")
+            futures = {
+                ex.submit(export, str(fpath), output_csv_path=str(csv_path)): fpath
+                for fpath, csv_path in pending
+            }
+            for fut in as_completed(futures):
+                try:
+                    out_path = fut.result()
+                    append_manifest(csv_dir, futures[fut], out_path)
+                    csv_count += 1
+                except Exception as e:
+                    print(f"⚠️ Erro ao gerar CSV de {futures[fut].name}: {e}")
+        finally:
+            if executor is None:
+                ex.shutdown()
 
     return len(files or []), csv_count
 
@@ -336,11 +799,13 @@ def main():
     total_nc = 0
     total_csv = 0
 
-    # percorre do mês MAIS RECENTE para o MAIS ANTIGO
-    for mstart, mend in month_windows_desc(START_DATE, END_DATE):
-        print(f"\n=== {mstart.strftime('%Y-%m')} ===")
-        try:
-            got_nc, got_csv = search_and_download_month(
+    # meses enfileirados do MAIS RECENTE para o MAIS ANTIGO; MONTH_WORKERS buscam/baixam
+    # em paralelo e todos dividem um único pool de processos para gerar os CSVs
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=MP_CONTEXT) as pool, \
+            ThreadPoolExecutor(max_workers=MONTH_WORKERS) as months:
+        futures = {
+            months.submit(
+                search_and_download_month,
                 mstart, mend,
                 short_name=SHORT_NAME,
                 granule_name=GRANULE_NAME,
@@ -348,11 +813,19 @@ def main():
                 nc_dir=NC_DIR,
                 csv_dir=CSV_DIR,
                 sort_key="-start_date",  # tenta ordenar mais-recente→mais-antigo
-            )
-            total_nc += got_nc
-            total_csv += got_csv
-        except Exception as e:
-            print(f"⚠️ Erro no mês {mstart.strftime('%Y-%m')}: {e}")
+                executor=pool,
+            ): mstart
+            for mstart, mend in month_windows_desc(START_DATE, END_DATE)
+        }
+        for fut in as_completed(futures):
+            mstart = futures[fut]
+            try:
+                got_nc, got_csv = fut.result()
+                total_nc += got_nc
+                total_csv += got_csv
+                print(f"=== {mstart.strftime('%Y-%m')}: {got_nc} NetCDF, {got_csv} CSV ===")
+            except Exception as e:
+                print(f"⚠️ Erro no mês {mstart.strftime('%Y-%m')}: {e}")
 
     print("\n=== RESUMO ===")
     print(f"⬇️ NetCDF baixados: {total_nc}")
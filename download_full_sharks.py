@@ -9,16 +9,23 @@
 import os
 import time
 import math
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import datetime as dt
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, Tuple, Optional, List
+from typing import Dict, Tuple, Optional, List, Iterator
 
 # ===== H3 (compatível v3 e v4) =====
 try:
     import h3  # v3 (geo_to_h3/h3_to_geo) ou v4 (latlng_to_cell/cell_to_latlng)
+    import h3.api.numpy_int as h3i  # mesma API, mas com células uint64 (sem strings)
     _H3_V4 = hasattr(h3, "latlng_to_cell")
 
     def _latlng_to_h3(lat, lon, res):
@@ -30,6 +37,62 @@ try:
 except Exception as _e:
     raise ImportError("Pacote 'h3' não encontrado. Instale com: pip install 'h3>=3,<4'  (ou 'h3')")
 
+# ===== H3 vetorizado (opcional: h3ronpy, em Rust e multithread) =====
+try:
+    try:
+        from h3ronpy.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+    except ImportError:  # h3ronpy < 0.21
+        from h3ronpy.arrow.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+except Exception:
+    _h3r_to_cells = None
+    _h3r_to_coords = None
+
+
+def _latlng_to_h3_array(lats: np.ndarray, lons: np.ndarray, res: int) -> np.ndarray:
+    """Indexa arrays de lat/lon em células H3 (uint64) de uma vez só."""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if _h3r_to_cells is not None:
+        return np.asarray(_h3r_to_cells(lats, lons, res), dtype=np.uint64)
+    # sem h3ronpy: ainda ponto a ponto, mas via numpy_int (sem criar strings/listas)
+    fn = h3i.latlng_to_cell if _H3_V4 else h3i.geo_to_h3
+    return np.fromiter(map(fn, lats.tolist(), lons.tolist(), repeat(res, lats.size)), dtype=np.uint64, count=lats.size)
+
+
+def _h3_to_latlng_array(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Centróides (lat, lon) de um array de células H3 uint64."""
+    cells = np.ascontiguousarray(cells, dtype=np.uint64)
+    if _h3r_to_coords is not None:
+        coords = _h3r_to_coords(cells)
+        return np.asarray(coords["lat"], dtype=np.float64), np.asarray(coords["lng"], dtype=np.float64)
+    fn = h3i.cell_to_latlng if _H3_V4 else h3i.h3_to_geo
+    latlng = np.array([fn(c) for c in cells.tolist()], dtype=np.float64).reshape(-1, 2)
+    return latlng[:, 0], latlng[:, 1]
+
+
+def _h3_to_str_array(cells: np.ndarray) -> np.ndarray:
+    """uint64 → hex (mesmo formato de h3.int_to_str / h3.h3_to_string) para o CSV."""
+    return np.array([format(c, "x") for c in np.asarray(cells, dtype=np.uint64).tolist()], dtype=object)
+
+# ===== JSON rápido (opcional: orjson, em Rust) =====
+try:
+    import orjson
+
+    def _json(resp: requests.Response):
+        return orjson.loads(resp.content)
+
+except Exception:
+    def _json(resp: requests.Response):
+        return resp.json()
+
+# ===== PyArrow (opcional: escrita de CSV em C++ multithread / Parquet) =====
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except Exception:
+    pa = None
+    pacsv = None
+
 
 # =============================
 # CONFIGURAÇÕES
@@ -54,9 +117,12 @@ END_DATE = dt.date(2025, 1, 1)
 OBIS_URL = "https://api.obis.org/v3/occurrence"
 PAGE_SIZE = 1000
 REQUEST_TIMEOUT = 60
-REQUEST_SLEEP = 0.2    # pausa entre páginas por educação com a API
+REQUEST_SLEEP = 0.2    # pausa (por conexão) depois de cada requisição, por educação com a API
 MAX_RETRIES = 3
 RETRY_SLEEP = 1.0
+PAGE_WORKERS = 8       # páginas buscadas em paralelo depois da 1ª (que informa o total)
+SPECIES_WORKERS = 8    # espécies consultadas em paralelo (mesma sessão)
+MAX_CONCURRENT_REQUESTS = 16  # teto de requisições simultâneas ao OBIS (espécies × páginas), = tamanho do pool HTTP
 
 # H3
 H3_RESOLUTION = 5
@@ -67,6 +133,14 @@ BASE_DIR = Path("downloads/sharks")
 # agora salvamos por período (um arquivo para o intervalo start..end)
 CSV_DIR = BASE_DIR / "period"
 CSV_DIR.mkdir(parents=True, exist_ok=True)
+# Formato de saída: "csv" (lido pelo viewer web) ou "parquet" (zstd, menor e mais rápido)
+OUTPUT_FORMAT = "csv"
+OUTPUT_EXT = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+# Coluna h3: "hex" (string, formato que o viewer web lê) ou "uint64" (inteiro: arquivo menor, join mais rápido)
+H3_ID_FORMAT = "hex"
+# "period": um arquivo para o intervalo todo; "daily": um arquivo por dia
+# (no modo diário a consulta ao OBIS é feita por mês e separada por dia localmente)
+OUTPUT_MODE = "period"
 
 # Comportamento
 SKIP_IF_EXISTS = True    # se o CSV do dia existir, pula
@@ -77,22 +151,142 @@ VERBOSE = True
 # HELPERS
 # =============================
 
+# Sessão única: reaproveita conexões TCP/TLS entre páginas (e entre threads)
+SESSION = requests.Session()
+SESSION.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "kipp-shark/1.0"})
+# todas as requisições passam por _REQ_SLOTS (MAX_CONCURRENT_REQUESTS por vez), então o pool do
+# urllib3 nunca fica cheio e nenhuma conexão keep-alive é descartada;
+# tentativas com backoff exponencial ficam no urllib3 (inclui 429/5xx, respeitando o Retry-After do OBIS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=MAX_CONCURRENT_REQUESTS,
+    max_retries=Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_SLEEP,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+))
+
+
+# vagas de requisição compartilhadas por todas as threads (espécies e páginas)
+_REQ_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
 def _req_get(url: str, params: dict) -> Optional[requests.Response]:
-    """GET com tentativas e backoff simples."""
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            r = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-            if r.status_code == 200:
-                return r
-            if VERBOSE:
-                print(f"⚠️  HTTP {r.status_code} (tentativa {attempt}/{MAX_RETRIES})")
-        except Exception as e:
-            if VERBOSE:
-                print(f"⚠️  Erro de rede: {e} (tentativa {attempt}/{MAX_RETRIES})")
-        time.sleep(RETRY_SLEEP * attempt)
+    """
+    GET pela sessão (tentativas/backoff no HTTPAdapter). Retorna None se falhar de vez.
+    No máximo MAX_CONCURRENT_REQUESTS ao mesmo tempo; cada vaga espera REQUEST_SLEEP antes
+    de ser liberada, o que limita o ritmo a ~MAX_CONCURRENT_REQUESTS / REQUEST_SLEEP req/s.
+    """
+    try:
+        with _REQ_SLOTS:
+            try:
+                r = SESSION.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            finally:
+                time.sleep(REQUEST_SLEEP)
+    except requests.RequestException as e:
+        if VERBOSE:
+            print(f"⚠️  Erro de rede: {e} (após {MAX_RETRIES} tentativas)")
+        return None
+    if r.status_code == 200:
+        return r
+    if VERBOSE:
+        print(f"⚠️  HTTP {r.status_code} (após {MAX_RETRIES} tentativas)")
     return None
 
 
+def _h3_output(cells: np.ndarray) -> np.ndarray:
+    """Coluna h3 de saída conforme H3_ID_FORMAT (uint64 sai direto, sem virar string)."""
+    if H3_ID_FORMAT == "uint64":
+        return np.asarray(cells, dtype=np.uint64)
+    return _h3_to_str_array(cells)
+
+
+def _write_table(df: pd.DataFrame, path: Path) -> None:
+    """Grava conforme OUTPUT_FORMAT; CSV usa o writer C++ do pyarrow quando disponível."""
+    if OUTPUT_FORMAT == "parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    elif pa is not None:
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _fetch_pages(params: dict) -> Iterator[List[dict]]:
+    """
+    Gera os `results` de todas as páginas de uma consulta OBIS.
+    A 1ª página informa o `total`; as demais são buscadas em paralelo
+    (PAGE_WORKERS threads na mesma sessão), na ordem em que chegarem.
+    """
+    resp = _req_get(OBIS_URL, {**params, "size": PAGE_SIZE, "from": 0})
+    if resp is None:
+        return
+    data = _json(resp)
+    results = data.get("results", [])
+    if not results:
+        return
+    yield results
+
+    total_est = data.get("total")
+    if total_est is None:
+        # sem total: pagina em série até acabar
+        offset = PAGE_SIZE
+        while True:
+            resp = _req_get(OBIS_URL, {**params, "size": PAGE_SIZE, "from": offset})
+            if resp is None:
+                return
+            results = _json(resp).get("results", [])
+            if not results:
+                return
+            yield results
+            offset += PAGE_SIZE
+
+    offsets = range(PAGE_SIZE, total_est, PAGE_SIZE)
+    if not offsets:
+        return
+    with ThreadPoolExecutor(max_workers=min(PAGE_WORKERS, len(offsets))) as ex:
+        futures = [ex.submit(_req_get, OBIS_URL, {**params, "size": PAGE_SIZE, "from": off}) for off in offsets]
+        for fut in as_completed(futures):
+            resp = fut.result()
+            if resp is None:
+                # falha definitiva nessa página
+                continue
+            results = _json(resp).get("results", [])
+            if results:
+                yield results
+
+
+OUT_COLUMNS = ["date", "species", "h3", "n_obs", "centroid_lat", "centroid_lon"]
+
+
+def _counts_frame(species: str, dates, cells: List[int], n_obs: List[int]) -> pd.DataFrame:
+    """
+    DataFrame (em colunas) das contagens de uma espécie; `dates` pode ser uma data só (broadcast).
+    Células chegam como uint64; centróide e id de saída são calculados uma vez por hex único
+    e espalhados pelo índice inverso.
+    """
+    uniq, inv = np.unique(np.asarray(cells, dtype=np.uint64), return_inverse=True)
+    cent_lat, cent_lon = _h3_to_latlng_array(uniq)
+    return pd.DataFrame({
+        "date": dates,
+        "species": species,
+        "h3": _h3_output(uniq)[inv],
+        "n_obs": np.asarray(n_obs, dtype=np.int64),
+        "centroid_lat": cent_lat[inv],
+        "centroid_lon": cent_lon[inv],
+    })
+
+
+def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+    """date/species/h3 repetem muito → categóricos (códigos inteiros em vez de strings por linha)."""
+    for col in ("date", "species", "h3"):
+        df[col] = df[col].astype("category")
+    return df
+
+
 def daterange(start_date: datetime.date, end_date: datetime.date):
     """Gera dias [start_date, end_date], mais recente → mais antigo."""
     cur = end_date
@@ -101,36 +295,33 @@ def daterange(start_date: datetime.date, end_date: datetime.date):
         cur -= timedelta(days=1)
 
 
-def fetch_one_species_one_day(species: str, day: datetime.date) -> Dict[str, int]:
+def monthrange(start_date: datetime.date, end_date: datetime.date):
+    """Gera janelas mensais (início, fim) cobrindo [start_date, end_date], mais recente → mais antigo."""
+    cur = end_date.replace(day=1)
+    while cur >= start_date.replace(day=1):
+        nxt = (cur.replace(day=28) + timedelta(days=4)).replace(day=1)
+        yield max(cur, start_date), min(nxt - timedelta(days=1), end_date)
+        cur = (cur - timedelta(days=1)).replace(day=1)
+
+
+def fetch_one_species_one_day(species: str, day: datetime.date) -> Dict[int, int]:
     """
     Busca no OBIS **global** por uma espécie em um único dia (start=end=day),
     e agrega contagem por H3 (resolução H3_RESOLUTION).
-    Retorna dict {h3_id: n_obs}.
+    Retorna dict {célula H3 como int: n_obs}.
     """
-    total_est = None
-    offset = 0
-    hex_counts: Dict[str, int] = {}
-
-    while True:
-        params = {
-            "scientificname": species,
-            "startdate": day.isoformat(),
-            "enddate": day.isoformat(),
-            "size": PAGE_SIZE,
-            "from": offset,
-        }
-        resp = _req_get(OBIS_URL, params)
-        if resp is None:
-            # falha definitiva nesse bloco/página
-            break
-
-        data = resp.json()
-        results = data.get("results", [])
-        total_est = data.get("total", total_est)
-
-        if not results:
-            break
-
+    params = {
+        "scientificname": species,
+        "startdate": day.isoformat(),
+        "enddate": day.isoformat(),
+        # só as coordenadas: resposta bem menor e JSON mais rápido de decodificar
+        "fields": "decimalLatitude,decimalLongitude",
+    }
+
+    # só junta as coordenadas válidas; o H3 e a contagem são feitos de uma vez no fim
+    lats: List[float] = []
+    lons: List[float] = []
+    for results in _fetch_pages(params):
         for rec in results:
             lat = rec.get("decimalLatitude")
             lon = rec.get("decimalLongitude")
@@ -138,24 +329,24 @@ def fetch_one_species_one_day(species: str, day: datetime.date) -> Dict[str, int
                 continue
             try:
                 lat = float(lat); lon = float(lon)
-                if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
-                    continue
-                h = _latlng_to_h3(lat, lon, H3_RESOLUTION)
-                hex_counts[h] = hex_counts.get(h, 0) + 1
-            except Exception:
+            except (TypeError, ValueError):
+                continue
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
                 continue
+            lats.append(lat)
+            lons.append(lon)
 
-        offset += PAGE_SIZE
-        if total_est is not None and offset >= total_est:
-            break
+    if not lats:
+        return {}
 
-        time.sleep(REQUEST_SLEEP)
+    cells, counts = np.unique(_latlng_to_h3_array(np.array(lats), np.array(lons), H3_RESOLUTION), return_counts=True)
 
     # filtro mínimo de pontos por hex (opcional)
-    if MIN_POINTS_PER_HEX > 1 and hex_counts:
-        hex_counts = {h: n for h, n in hex_counts.items() if n >= MIN_POINTS_PER_HEX}
+    if MIN_POINTS_PER_HEX > 1:
+        keep = counts >= MIN_POINTS_PER_HEX
+        cells, counts = cells[keep], counts[keep]
 
-    return hex_counts
+    return dict(zip(cells.tolist(), counts.tolist()))
 
 
 def fetch_all_species_one_day(day: datetime.date) -> pd.DataFrame:
@@ -164,70 +355,54 @@ def fetch_all_species_one_day(day: datetime.date) -> pd.DataFrame:
     Retorna DataFrame com colunas:
       date, species, h3, n_obs, centroid_lat, centroid_lon
     """
-    rows = []
-    for sp in SPECIES:
+    def _fetch(sp: str) -> Dict[int, int]:
         if VERBOSE:
             print(f"📡 {day} | espécie={sp}")
-        counts = fetch_one_species_one_day(sp, day)
-        if not counts:
-            continue
-        for h, n in counts.items():
-            clat, clon = _h3_to_latlng(h)
-            rows.append({
-                "date": day.isoformat(),
-                "species": sp,
-                "h3": h,
-                "n_obs": n,
-                "centroid_lat": clat,
-                "centroid_lon": clon,
-            })
-
-    if not rows:
-        return pd.DataFrame(columns=["date","species","h3","n_obs","centroid_lat","centroid_lon"])
-    return pd.DataFrame(rows)
+        return fetch_one_species_one_day(sp, day)
+
+    # espécies são independentes (I/O de rede) → em paralelo; map mantém a ordem de SPECIES
+    with ThreadPoolExecutor(max_workers=min(SPECIES_WORKERS, len(SPECIES))) as ex:
+        per_species = list(ex.map(_fetch, SPECIES))
+    frames = [
+        _counts_frame(sp, day.isoformat(), list(counts.keys()), list(counts.values()))
+        for sp, counts in zip(SPECIES, per_species)
+        if counts
+    ]
+    if not frames:
+        return pd.DataFrame(columns=OUT_COLUMNS)
+    return _categorize(pd.concat(frames, ignore_index=True))
 
 
 def save_daily_csv(day: datetime.date, df: pd.DataFrame):
     """Salva o CSV do dia no padrão solicitado (um arquivo por dia)."""
-    out_path = CSV_DIR / f"sharks_h3r{H3_RESOLUTION}_{day.isoformat()}.csv"
+    out_path = CSV_DIR / f"sharks_h3r{H3_RESOLUTION}_{day.isoformat()}{OUTPUT_EXT}"
     if SKIP_IF_EXISTS and out_path.exists():
         if VERBOSE:
             print(f"↪️  Já existe: {out_path.name} (pulado)")
         return
-    df.to_csv(out_path, index=False)
+    _write_table(df, out_path)
     print(f"💾 CSV salvo: {out_path} ({len(df)} linhas)")
 
 
-def fetch_one_species_period(species: str, start_date: datetime.date, end_date: datetime.date) -> Dict[Tuple[str, str], int]:
+def fetch_one_species_period(species: str, start_date: datetime.date, end_date: datetime.date) -> Dict[Tuple[str, int], int]:
     """
     Busca no OBIS **global** para uma espécie em um período (start_date → end_date),
     e agrega contagem por (date_iso, H3).
-    Retorna dict {(date_iso, h3_id): n_obs}.
+    Retorna dict {(date_iso, célula H3 como int): n_obs}.
     """
-    total_est = None
-    offset = 0
-    counts: Dict[Tuple[str, str], int] = {}
-
-    while True:
-        params = {
-            "scientificname": species,
-            "startdate": start_date.isoformat(),
-            "enddate": end_date.isoformat(),
-            "size": PAGE_SIZE,
-            "from": offset,
-        }
-        resp = _req_get(OBIS_URL, params)
-        if resp is None:
-            # falha definitiva nesse bloco/página
-            break
-
-        data = resp.json()
-        results = data.get("results", [])
-        total_est = data.get("total", total_est)
-
-        if not results:
-            break
-
+    params = {
+        "scientificname": species,
+        "startdate": start_date.isoformat(),
+        "enddate": end_date.isoformat(),
+        "fields": "decimalLatitude,decimalLongitude,eventDate",
+    }
+    # só junta data + coordenadas válidas; H3 e contagem por (data, hex) saem de uma vez no fim
+    dates: List[str] = []
+    lats: List[float] = []
+    lons: List[float] = []
+
+    # 1ª página informa o total; as demais chegam em paralelo (_fetch_pages)
+    for results in _fetch_pages(params):
         for rec in results:
             lat = rec.get("decimalLatitude")
             lon = rec.get("decimalLongitude")
@@ -238,32 +413,31 @@ def fetch_one_species_period(species: str, start_date: datetime.date, end_date:
             ev = rec.get("eventDate") or rec.get("date") or rec.get("eventdate")
             if not ev:
                 continue
-            try:
-                date_iso = str(ev)[:10]
-            except Exception:
-                continue
 
             try:
                 lat = float(lat); lon = float(lon)
-                if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
-                    continue
-                h = _latlng_to_h3(lat, lon, H3_RESOLUTION)
-                key = (date_iso, h)
-                counts[key] = counts.get(key, 0) + 1
-            except Exception:
+            except (TypeError, ValueError):
+                continue
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
                 continue
+            dates.append(str(ev)[:10])
+            lats.append(lat)
+            lons.append(lon)
 
-        offset += PAGE_SIZE
-        if total_est is not None and offset >= total_est:
-            break
+    if not lats:
+        return {}
 
-        time.sleep(REQUEST_SLEEP)
+    cells = _latlng_to_h3_array(np.array(lats), np.array(lons), H3_RESOLUTION)
+    days, day_idx = np.unique(np.array(dates), return_inverse=True)
+    pairs, counts = np.unique(np.column_stack([day_idx.astype(np.uint64), cells]), axis=0, return_counts=True)
 
     # filtro mínimo (aplica-se por (date,hex))
-    if MIN_POINTS_PER_HEX > 1 and counts:
-        counts = {k: n for k, n in counts.items() if n >= MIN_POINTS_PER_HEX}
+    if MIN_POINTS_PER_HEX > 1:
+        keep = counts >= MIN_POINTS_PER_HEX
+        pairs, counts = pairs[keep], counts[keep]
 
-    return counts
+    keys = zip(days[pairs[:, 0].astype(np.intp)].tolist(), pairs[:, 1].tolist())
+    return dict(zip(keys, counts.tolist()))
 
 
 def fetch_all_species_period(start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
@@ -272,37 +446,47 @@ def fetch_all_species_period(start_date: datetime.date, end_date: datetime.date)
     Retorna DataFrame com colunas:
       date, species, h3, n_obs, centroid_lat, centroid_lon
     """
-    rows = []
-    for sp in SPECIES:
+    def _fetch(sp: str) -> Dict[Tuple[str, int], int]:
         if VERBOSE:
             print(f"📡 Período {start_date} → {end_date} | espécie={sp}")
-        counts = fetch_one_species_period(sp, start_date, end_date)
+        return fetch_one_species_period(sp, start_date, end_date)
+
+    # espécies são independentes (I/O de rede) → em paralelo; map mantém a ordem de SPECIES
+    with ThreadPoolExecutor(max_workers=min(SPECIES_WORKERS, len(SPECIES))) as ex:
+        per_species = list(ex.map(_fetch, SPECIES))
+    frames = []
+    for sp, counts in zip(SPECIES, per_species):
         if not counts:
             continue
-        for (date_iso, h), n in counts.items():
-            clat, clon = _h3_to_latlng(h)
-            rows.append({
-                "date": date_iso,
-                "species": sp,
-                "h3": h,
-                "n_obs": n,
-                "centroid_lat": clat,
-                "centroid_lon": clon,
-            })
-
-    if not rows:
-        return pd.DataFrame(columns=["date","species","h3","n_obs","centroid_lat","centroid_lon"])
-    return pd.DataFrame(rows)
+        dates, cells = zip(*counts.keys())
+        frames.append(_counts_frame(sp, list(dates), list(cells), list(counts.values())))
+    if not frames:
+        return pd.DataFrame(columns=OUT_COLUMNS)
+    return _categorize(pd.concat(frames, ignore_index=True))
+
+
+def fetch_all_species_one_month(month_start: datetime.date, month_end: datetime.date) -> Dict[str, pd.DataFrame]:
+    """
+    Busca **todas as espécies** para o mês inteiro (uma consulta por espécie em vez
+    de uma por dia) e separa o resultado por dia.
+    Retorna {date_iso: DataFrame do dia} com o mesmo esquema de fetch_all_species_one_day.
+    """
+    df = fetch_all_species_period(month_start, month_end)
+    # o OBIS devolve ocorrências cujo intervalo de eventDate só toca o mês: dias de meses
+    # vizinhos viriam incompletos (e o SKIP_IF_EXISTS impediria a gravação correta depois)
+    dates = df["date"].astype(str)
+    df = df[(dates >= month_start.isoformat()) & (dates <= month_end.isoformat())]
+    return {d: g.reset_index(drop=True) for d, g in df.groupby("date", observed=True, sort=False)}
 
 
 def save_period_csv(start_date: datetime.date, end_date: datetime.date, df: pd.DataFrame):
     """Salva o CSV do período no padrão solicitado (um arquivo para o intervalo)."""
-    out_path = CSV_DIR / f"sharks_h3r{H3_RESOLUTION}_{start_date.isoformat()}_{end_date.isoformat()}.csv"
+    out_path = CSV_DIR / f"sharks_h3r{H3_RESOLUTION}_{start_date.isoformat()}_{end_date.isoformat()}{OUTPUT_EXT}"
     if SKIP_IF_EXISTS and out_path.exists():
         if VERBOSE:
             print(f"↪️  Já existe: {out_path.name} (pulado)")
         return
-    df.to_csv(out_path, index=False)
+    _write_table(df, out_path)
     print(f"💾 CSV salvo: {out_path} ({len(df)} linhas)")
 
 
@@ -316,11 +500,23 @@ def main():
     print(f"🧪 Espécies: {', '.join(SPECIES)}")
     print(f"🔷 H3 res={H3_RESOLUTION}, min_points_per_hex={MIN_POINTS_PER_HEX}")
     print(f"📂 Saída: {CSV_DIR.resolve()}\n")
-    df_period = fetch_all_species_period(START_DATE, END_DATE)
-    if df_period.empty:
-        print("⚠️  Sem ocorrências para o período.")
+    if OUTPUT_MODE == "daily":
+        for month_start, month_end in monthrange(START_DATE, END_DATE):
+            by_day = fetch_all_species_one_month(month_start, month_end)
+            if not by_day:
+                print(f"⚠️  Sem ocorrências em {month_start} → {month_end}.")
+            for date_iso in sorted(by_day, reverse=True):
+                try:
+                    day = dt.date.fromisoformat(date_iso)
+                except ValueError:
+                    continue
+                save_daily_csv(day, by_day[date_iso])
     else:
-        save_period_csv(START_DATE, END_DATE, df_period)
+        df_period = fetch_all_species_period(START_DATE, END_DATE)
+        if df_period.empty:
+            print("⚠️  Sem ocorrências para o período.")
+        else:
+            save_period_csv(START_DATE, END_DATE, df_period)
 
     print("\n🏁 Finalizado.")
 
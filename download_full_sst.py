@@ -8,8 +8,14 @@
 import os
 import re
 import datetime as dt
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
+from io import StringIO
 from pathlib import Path
-from typing import Iterable, Tuple, Optional, List
+from itertools import repeat
+from typing import Dict, Iterable, Tuple, Optional, List
 
 import numpy as np
 import pandas as pd
@@ -18,9 +24,18 @@ from dotenv import load_dotenv
 import earthaccess
 import json
 
+# ===== PyArrow (opcional: escrita de CSV em C++ multithread / Parquet) =====
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except Exception:
+    pa = None
+    pacsv = None
+
 # ===== H3 (compatível v3 e v4) =====
 try:
     import h3  # v3 (geo_to_h3/h3_to_geo) ou v4 (latlng_to_cell/cell_to_latlng)
+    import h3.api.numpy_int as h3i  # mesma API, mas com células uint64 (sem strings)
     _H3_V4 = hasattr(h3, "latlng_to_cell")
 
     def _latlng_to_h3(lat, lon, res):
@@ -31,12 +46,50 @@ try:
 
 except Exception as _e:
     h3 = None
+    h3i = None
     _H3_V4 = False
     def _latlng_to_h3(*args, **kwargs):
         raise ImportError("Pacote 'h3' não instalado. Rode: pip install 'h3>=3,<4' ou 'h3'")
     def _h3_to_latlng(*args, **kwargs):
         raise ImportError("Pacote 'h3' não instalado. Rode: pip install 'h3>=3,<4' ou 'h3'")
 
+# ===== H3 vetorizado (opcional: h3ronpy, em Rust e multithread) =====
+try:
+    try:
+        from h3ronpy.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+    except ImportError:  # h3ronpy < 0.21
+        from h3ronpy.arrow.vector import coordinates_to_cells as _h3r_to_cells, cells_to_coordinates as _h3r_to_coords
+except Exception:
+    _h3r_to_cells = None
+    _h3r_to_coords = None
+
+
+def _latlng_to_h3_array(lats: np.ndarray, lons: np.ndarray, res: int) -> np.ndarray:
+    """Indexa arrays de lat/lon em células H3 (uint64) de uma vez só."""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if _h3r_to_cells is not None:
+        return np.asarray(_h3r_to_cells(lats, lons, res), dtype=np.uint64)
+    # sem h3ronpy: ainda ponto a ponto, mas via numpy_int (sem criar strings/listas)
+    fn = h3i.latlng_to_cell if _H3_V4 else h3i.geo_to_h3
+    return np.fromiter(map(fn, lats.tolist(), lons.tolist(), repeat(res, lats.size)), dtype=np.uint64, count=lats.size)
+
+
+def _h3_to_latlng_array(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Centróides (lat, lon) de um array de células H3 uint64."""
+    cells = np.ascontiguousarray(cells, dtype=np.uint64)
+    if _h3r_to_coords is not None:
+        coords = _h3r_to_coords(cells)
+        return np.asarray(coords["lat"], dtype=np.float64), np.asarray(coords["lng"], dtype=np.float64)
+    fn = h3i.cell_to_latlng if _H3_V4 else h3i.h3_to_geo
+    latlng = np.array([fn(c) for c in cells.tolist()], dtype=np.float64).reshape(-1, 2)
+    return latlng[:, 0], latlng[:, 1]
+
+
+def _h3_to_str_array(cells: np.ndarray) -> np.ndarray:
+    """uint64 → hex (mesmo formato de h3.int_to_str / h3.h3_to_string) para o CSV."""
+    return np.array([format(c, "x") for c in np.asarray(cells, dtype=np.uint64).tolist()], dtype=object)
+
 # =========================
 # CONFIGURAÇÕES
 # =========================
@@ -55,6 +108,33 @@ DOWNSAMPLE = 1  # menor valor = mais pontos
 H3_RESOLUTION = 5
 H3_AGGREGATE = True  # agrega por hex (gera média/min/máx/std/contagem + centróides)
 
+# Leitura do NetCDF em blocos de linhas (latitudes) para limitar o pico de memória
+# (arredondado para múltiplo do chunk HDF5 da variável, ver _block_rows).
+CHUNK_ROWS = 512
+
+# Formato de saída: "csv" (lido pelo viewer web) ou "parquet" (zstd, menor e mais rápido)
+OUTPUT_FORMAT = "csv"
+OUTPUT_EXT = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+
+# Grade L3m é fixa entre arquivos: True guarda as células H3 da grade inteira por processo
+# (8 bytes/pixel: ~300 MB e ~14 s de H3 na grade de 4 km, em CADA worker, indexando também
+# terra/nuvem). Só compensa com poucos workers e muitos arquivos por worker (> ~3).
+# False (padrão) = H3 por arquivo, só nos pixels válidos.
+CACHE_GRID_H3 = False
+
+# Processos usados para gerar os CSVs em paralelo (1 = serial)
+MAX_WORKERS = os.cpu_count() or 1
+# Meses buscados/baixados ao mesmo tempo (I/O de rede); poucos, por etiqueta com o DAAC da NASA
+MONTH_WORKERS = 3
+# Downloads simultâneos por mês dentro do earthaccess.download; divididos entre os meses
+# para o total de transferências com o DAAC continuar em ~8
+DOWNLOAD_THREADS = max(1, 8 // MONTH_WORKERS)
+# Processos dos pools: forkserver/spawn, não fork — o pool é iniciado com threads de busca/download
+# em andamento e um fork herdaria os locks delas (SSL, urllib3, stdout) no meio do uso
+MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
 
 # =========================
 # LOGIN
@@ -67,8 +147,6 @@ def authenticate() -> bool:
 
     print("🔐 Autenticando no Earthdata...")
     try:
-        from contextlib import redirect_stdout, redirect_stderr
-        from io import StringIO
         with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
             auth = earthaccess.login(strategy="environment")
         if auth:
@@ -94,7 +172,192 @@ def month_windows(start: dt.date, end: dt.date) -> Iterable[Tuple[dt.date, dt.da
         cur = nxt
 
 def month_windows_desc(start: dt.date, end: dt.date) -> Iterable[Tuple[dt.date, dt.date]]:
-    return reversed(list(month_windows(start, end)))
+    cur = dt.date(end.year, end.month, 1)
+    first = dt.date(start.year, start.month, 1)
+    while cur >= first:
+        nxt = (cur.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+        yield cur, min(nxt - dt.timedelta(days=1), end)
+        cur = (cur - dt.timedelta(days=1)).replace(day=1)
+
+
+# =========================
+# AGREGAÇÃO H3 (NumPy)
+# =========================
+def _group_runs(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ordena por célula uma única vez → (ordem, células únicas, início de cada grupo, tamanho do grupo)."""
+    order = np.argsort(cells, kind="stable")
+    cells_s = cells[order]
+    starts = np.flatnonzero(np.r_[True, cells_s[1:] != cells_s[:-1]]) if cells_s.size else np.array([], dtype=np.intp)
+    sizes = np.diff(np.append(starts, cells_s.size))
+    return order, cells_s[starts], starts, sizes
+
+
+def _h3_partial_stats(cells: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Estatísticas parciais de um bloco por hex: n, média, M2 (Welford), mín, máx."""
+    order, keys, starts, n = _group_runs(cells)
+    v = values[order].astype(np.float64)
+    mean = np.add.reduceat(v, starts) / n
+    return {
+        "h3": keys,
+        "n": n,
+        "mean": mean,
+        "m2": np.add.reduceat((v - np.repeat(mean, n)) ** 2, starts),
+        "min": np.minimum.reduceat(v, starts),
+        "max": np.maximum.reduceat(v, starts),
+    }
+
+
+def _merge_h3_stats(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Combina as parciais de todos os blocos (fórmula paralela de Chan) → n, mean, std, min, max."""
+    if not parts:
+        empty = np.array([], dtype=np.float64)
+        return {"h3": np.array([], dtype=np.uint64), "n": np.array([], dtype=np.int64),
+                "mean": empty, "std": empty, "min": empty, "max": empty}
+    allp = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    order, keys, starts, sizes = _group_runs(allp["h3"])
+    n_k, mean_k, m2_k = allp["n"][order], allp["mean"][order], allp["m2"][order]
+    n = np.add.reduceat(n_k, starts)
+    mean = np.add.reduceat(n_k * mean_k, starts) / n
+    m2 = np.add.reduceat(m2_k + n_k * (mean_k - np.repeat(mean, sizes)) ** 2, starts)
+    # desvio amostral (ddof=1), como o pandas: NaN quando o hex tem um único ponto
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+    return {
+        "h3": keys,
+        "n": n,
+        "mean": mean,
+        "std": std,
+        "min": np.minimum.reduceat(allp["min"][order], starts),
+        "max": np.maximum.reduceat(allp["max"][order], starts),
+    }
+
+
+@lru_cache(maxsize=1)  # uma grade por processo (~300 MB na de 4 km)
+def _grid_cells(lat_bytes: bytes, lon_bytes: bytes, res: int) -> np.ndarray:
+    """Células H3 (uint64, nlat x nlon) da grade lat/lon inteira; calculadas uma vez por processo."""
+    lats = np.frombuffer(lat_bytes, dtype=np.float64)
+    lons = np.frombuffer(lon_bytes, dtype=np.float64)
+    cells = np.empty((lats.size, lons.size), dtype=np.uint64)
+    for i0 in range(0, lats.size, CHUNK_ROWS):
+        i1 = min(i0 + CHUNK_ROWS, lats.size)
+        cells[i0:i1] = _latlng_to_h3_array(
+            np.repeat(lats[i0:i1], lons.size), np.tile(lons, i1 - i0), res
+        ).reshape(i1 - i0, lons.size)
+    return cells
+
+
+# =========================
+# LEITURA (sem máscara automática do netCDF4)
+# =========================
+def _read_float(var, idx=slice(None), dtype=np.float32) -> np.ndarray:
+    """
+    Lê var[idx] como float com NaN nos pixels inválidos, sem np.ma.
+    Requer ds.set_auto_maskandscale(False): o _FillValue/valid_* é comparado no valor
+    bruto (int16) e só depois aplicamos scale_factor/add_offset.
+    """
+    raw = np.asarray(var[idx])
+    attrs = set(var.ncattrs())
+    bad = np.zeros(raw.shape, dtype=bool)
+    for name in ("_FillValue", "missing_value"):
+        if name in attrs:
+            bad |= np.isin(raw, np.atleast_1d(var.getncattr(name)))
+    if "valid_range" in attrs:
+        vmin, vmax = var.getncattr("valid_range")
+        bad |= (raw < vmin) | (raw > vmax)
+    if "valid_min" in attrs:
+        bad |= raw < var.getncattr("valid_min")
+    if "valid_max" in attrs:
+        bad |= raw > var.getncattr("valid_max")
+
+    out = raw.astype(dtype)
+    if "scale_factor" in attrs:
+        out *= dtype(var.getncattr("scale_factor"))
+    if "add_offset" in attrs:
+        out += dtype(var.getncattr("add_offset"))
+    out[bad] = np.nan
+    return out
+
+
+def _block_rows(var, lat_axis: int) -> int:
+    """
+    CHUNK_ROWS arredondado para múltiplo do chunk HDF5 no eixo da latitude:
+    nenhum chunk fica dividido entre dois blocos (cada um é descomprimido uma vez só).
+    """
+    try:
+        chunks = var.chunking()
+    except Exception:
+        return CHUNK_ROWS
+    if isinstance(chunks, str) or not chunks:  # "contiguous"
+        return CHUNK_ROWS
+    c = int(chunks[lat_axis])
+    return -(-CHUNK_ROWS // c) * c
+
+
+# =========================
+# ESCRITA (CSV / Parquet)
+# =========================
+def _write_table(df: pd.DataFrame, path: str) -> str:
+    """
+    Grava o DataFrame conforme OUTPUT_FORMAT e retorna o caminho final.
+    CSV usa o writer C++ do pyarrow quando disponível (senão, df.to_csv).
+    """
+    if OUTPUT_FORMAT == "parquet":
+        path = os.path.splitext(path)[0] + ".parquet"
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    elif pa is not None:
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+# =========================
+# DATA DO PRODUTO
+# =========================
+# Nome do arquivo já traz a data: AQUA_MODIS.20241101_20241130.L3m... (atual) ou A2024306... (antigo)
+_DATE_RE = re.compile(r"\.(\d{8})[._]")
+_DATE_DOY_RE = re.compile(r"A(\d{7})")
+
+
+# Atributo sem hora: formato escolhido pelo tamanho da string (YYYYMMDD / YYYY-MM-DD)
+_DATE_ATTR_PARSERS = {
+    8: lambda s: dt.datetime.strptime(s, "%Y%m%d").strftime("%Y-%m-%d"),
+    10: lambda s: dt.date.fromisoformat(s).isoformat(),
+}
+
+
+def _parse_date_attr(s) -> Optional[str]:
+    """Atributo de data do NetCDF → YYYY-MM-DD; None se vazio ou não reconhecido."""
+    if not s:
+        return None
+    try:
+        if "T" in s:
+            return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+        parse = _DATE_ATTR_PARSERS.get(len(s))
+        return parse(s) if parse else None
+    except Exception:
+        return None
+
+
+def _infer_date_string(filepath: str, ds) -> str:
+    """Data (YYYY-MM-DD) do produto: tenta o nome do arquivo; só lê atributos do NetCDF se falhar."""
+    fname = os.path.basename(filepath)
+    m = _DATE_RE.search(fname)
+    if m:
+        try:
+            return dt.datetime.strptime(m.group(1), "%Y%m%d").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    m = _DATE_DOY_RE.search(fname)
+    if m:
+        year = int(m.group(1)[:4]); doy = int(m.group(1)[4:])
+        d = dt.datetime(year, 1, 1) + dt.timedelta(days=doy - 1)
+        return d.strftime("%Y-%m-%d")
+    for attr in ("time_coverage_start", "start_time", "time_coverage_end", "end_time", "date_created"):
+        d = _parse_date_attr(getattr(ds, attr, None))
+        if d:
+            return d
+    return "data_nao_encontrada"
 
 
 # =========================
@@ -110,32 +373,102 @@ def export_csv(
 ) -> str:
     print(f"📝 Gerando CSV para {filepath}...")
     with nc.Dataset(filepath) as ds:
+        ds.set_auto_maskandscale(False)  # sem MaskedArray; fill/escala tratados em _read_float
         lat_var = "lat" if "lat" in ds.variables else ("latitude" if "latitude" in ds.variables else None)
         lon_var = "lon" if "lon" in ds.variables else ("longitude" if "longitude" in ds.variables else None)
         if not lat_var or not lon_var:
             raise KeyError("Variáveis 'lat'/'lon' não encontradas no NetCDF.")
 
-        lats = ds.variables[lat_var][:]
-        lons = ds.variables[lon_var][:]
+        lats = np.asarray(ds.variables[lat_var][:])
+        lons = np.asarray(ds.variables[lon_var][:])
 
         if "sst" not in ds.variables:
             raise KeyError("Variável 'sst' não encontrada.")
-        sst = np.squeeze(ds.variables["sst"][:])
-        sst = np.ma.filled(sst, np.nan)
+        sst_var = ds.variables["sst"]
+
+        # Grade (lat x lon) — a variável é lida em blocos de CHUNK_ROWS latitudes, nunca inteira.
+        # Descobre qual eixo é a latitude (ignorando eixos unitários, ex.: time=1).
+        nlat, nlon = np.size(lats), np.size(lons)
+        axes = [i for i, n in enumerate(sst_var.shape) if n != 1]
+        if len(axes) != 2:
+            raise ValueError(f"'sst' com {len(axes)} dimensões; esperado 2D.")
+        shape2d = tuple(sst_var.shape[i] for i in axes)
+        if shape2d == (nlat, nlon):
+            lat_axis, lon_axis, transposed = axes[0], axes[1], False
+        elif shape2d == (nlon, nlat):
+            lat_axis, lon_axis, transposed = axes[1], axes[0], True
+        else:
+            raise ValueError(f"Dimensões de 'sst' {shape2d} != grade {(nlat, nlon)}.")
+
+        if h3_resolution is not None and h3 is None:
+            raise ImportError("O pacote 'h3' não está instalado. Rode: pip install 'h3>=3,<4'")
+        aggregate = h3_resolution is not None and h3_aggregate
+        lats_1d = np.asarray(lats).ravel()
+        lons_1d = np.asarray(lons).ravel()
+        grid_cells = None
+        if aggregate and CACHE_GRID_H3 and np.isfinite(lats_1d).all() and np.isfinite(lons_1d).all():
+            grid_cells = _grid_cells(
+                lats_1d.astype(np.float64).tobytes(), lons_1d.astype(np.float64).tobytes(), h3_resolution
+            )
+
+        # ponto a ponto com downsample: o passo vai direto na leitura (lat e lon),
+        # então NaN/H3 só veem a grade reduzida; a agregação H3 usa todos os pixels
+        step = downsample if (not aggregate and downsample and downsample > 1) else 1
+        ncols = len(range(0, nlon, step))
+
+        # máscara NaN + H3 + agregação parcial por bloco; mín/máx acumulados no caminho
+        sst_min, sst_max = np.inf, -np.inf
+        parts: List[Dict[str, np.ndarray]] = []
+        pts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        block_rows = _block_rows(sst_var, lat_axis)
+        for i0 in range(0, nlat, block_rows):
+            i1 = min(i0 + block_rows, nlat)
+            r0 = i0 + (-i0) % step  # primeira linha do bloco que cai no passo global
+            nrows = len(range(r0, i1, step))
+            if nrows == 0:
+                continue
+            idx = [slice(None)] * sst_var.ndim
+            idx[lat_axis] = slice(r0, i1, step)
+            idx[lon_axis] = slice(None, None, step)
+            block = _read_float(sst_var, tuple(idx))
+            block = block.reshape(ncols, nrows).T if transposed else block.reshape(nrows, ncols)
+
+            # só pixels válidos (terra/nuvem = NaN ficam de fora)
+            ii, jj = np.nonzero(np.isfinite(block))
+            if ii.size == 0:
+                continue
+            sst_v = block[ii, jj]
+            lat_v = lats_1d[r0 + ii * step]
+            lon_v = lons_1d[jj * step]
+            sst_min = min(sst_min, float(sst_v.min()))
+            sst_max = max(sst_max, float(sst_v.max()))
+
+            if aggregate:
+                if grid_cells is not None:
+                    cells = grid_cells[r0 + ii, jj]
+                else:
+                    cells = _latlng_to_h3_array(lat_v, lon_v, h3_resolution)
+                parts.append(_h3_partial_stats(cells, sst_v))
+            else:
+                pts.append((lat_v, lon_v, sst_v))
+
+        if sst_min > sst_max:  # nenhum pixel válido
+            sst_min = sst_max = float("nan")
 
         # ======================================================
         # 🧭 DICIONÁRIO DE INSPEÇÃO (resumo do conteúdo bruto)
         # ======================================================
+        sample_idx = tuple([0] * (sst_var.ndim - 1) + [slice(0, 10)])
         sample_dict = {
             "arquivo": os.path.basename(filepath),
             "variaveis": list(ds.variables.keys()),
             "dimensoes": {k: tuple(v.shape) for k, v in ds.variables.items()},
             "atributos_globais": list(ds.ncattrs()),
-            "sst_shape": sst.shape,
-            "sst_range": [float(np.nanmin(sst)), float(np.nanmax(sst))],
+            "sst_shape": tuple(n for n in sst_var.shape if n != 1),
+            "sst_range": [sst_min, sst_max],
             "latitude_range": [float(np.nanmin(lats)), float(np.nanmax(lats))],
             "longitude_range": [float(np.nanmin(lons)), float(np.nanmax(lons))],
-            "sst_amostra": sst.flatten()[:10].tolist(),
+            "sst_amostra": _read_float(sst_var, sample_idx).ravel().tolist(),
         }
         print("🔍 Amostra do dado extraído:")
         for k, v in sample_dict.items():
@@ -148,104 +481,59 @@ def export_csv(
             json.dump(sample_dict, f, ensure_ascii=False, indent=2)
 
         # ======================================================
-        # Data do produto
-        def _infer_date_string() -> str:
-            for attr in ("time_coverage_start", "start_time", "time_coverage_end", "end_time"):
-                if hasattr(ds, attr):
-                    s = getattr(ds, attr)
-                    if s:
-                        try:
-                            if "T" in s:
-                                return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                            if len(s) == 8 and s.isdigit():
-                                return dt.datetime.strptime(s, "%Y%m%d").strftime("%Y-%m-%d")
-                        except Exception:
-                            pass
-            fname = os.path.basename(filepath)
-            m = re.search(r"A(\d{7})", fname)
-            if m:
-                year = int(m.group(1)[:4]); doy = int(m.group(1)[4:])
-                d = dt.datetime(year, 1, 1) + dt.timedelta(days=doy - 1)
-                return d.strftime("%Y-%m-%d")
-            if hasattr(ds, "date_created"):
-                try:
-                    s = getattr(ds, "date_created")
-                    if "T" in s:
-                        return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                except Exception:
-                    pass
-            return "data_nao_encontrada"
-
-        data_formatada = _infer_date_string()
-        sst_min = float(np.nanmin(sst))
-        sst_max = float(np.nanmax(sst))
+        # Data do produto (pelo nome do arquivo; atributos só se preciso)
+        data_formatada = _infer_date_string(filepath, ds)
         lat_range = (float(np.nanmin(lats)), float(np.nanmax(lats)))
         lon_range = (float(np.nanmin(lons)), float(np.nanmax(lons)))
         date_created = getattr(ds, "date_created", data_formatada)
 
-        lon_grid, lat_grid = np.meshgrid(lons, lats)
-        if sst.ndim != 2:
-            raise ValueError(f"'sst' com {sst.ndim} dimensões; esperado 2D.")
-        if sst.shape != lat_grid.shape:
-            if sst.T.shape == lat_grid.shape:
-                sst = sst.T
-            else:
-                raise ValueError(f"Dimensões de 'sst' {sst.shape} != grade {lat_grid.shape}.")
+    if not aggregate:
+        lat_v = np.concatenate([p[0] for p in pts]) if pts else np.array([], dtype=lats_1d.dtype)
+        lon_v = np.concatenate([p[1] for p in pts]) if pts else np.array([], dtype=lons_1d.dtype)
+        sst_v = np.concatenate([p[2] for p in pts]) if pts else np.array([], dtype=np.float32)
 
-        df = pd.DataFrame(
+    # H3 agregado: direto nos arrays (sem DataFrame por pixel nem groupby)
+    if aggregate:
+        stats = _merge_h3_stats(parts)
+        agg = pd.DataFrame(
             {
-                "latitude": lat_grid.ravel(),
-                "longitude": lon_grid.ravel(),
-                "sst": sst.ravel(),
-                "data": [data_formatada] * lat_grid.size,
-                "sst_min": [sst_min] * lat_grid.size,
-                "sst_max": [sst_max] * lat_grid.size,
-                "lat_range": [lat_range] * lat_grid.size,
-                "lon_range": [lon_range] * lat_grid.size,
-                "date_created": [date_created] * lat_grid.size,
+                "h3": stats["h3"],
+                "sst_mean": stats["mean"],
+                "sst_min": stats["min"],
+                "sst_max": stats["max"],
+                "sst_std": stats["std"],
+                "n": stats["n"],
             }
-        ).dropna(subset=["sst"])
+        )
+        agg["centroid_lat"], agg["centroid_lon"] = _h3_to_latlng_array(agg["h3"].to_numpy())
+        agg["h3"] = _h3_to_str_array(agg["h3"].to_numpy())
 
-    # H3 agregado
-    if h3_resolution is not None:
-        if h3 is None:
-            raise ImportError("O pacote 'h3' não está instalado. Rode: pip install 'h3>=3,<4'")
-
-        df["h3"] = [
-            _latlng_to_h3(lat, lon, h3_resolution) for lat, lon in zip(df["latitude"].values, df["longitude"].values)
-        ]
-
-        if h3_aggregate:
-            agg = df.groupby("h3", as_index=False).agg(
-                sst_mean=("sst", "mean"),
-                sst_min=("sst", "min"),
-                sst_max=("sst", "max"),
-                sst_std=("sst", "std"),
-                n=("sst", "count"),
-            )
-            centroids = [_h3_to_latlng(cell) for cell in agg["h3"].values]
-            agg["centroid_lat"] = [c[0] for c in centroids]
-            agg["centroid_lon"] = [c[1] for c in centroids]
-
-            agg["data"] = data_formatada
-            agg["date_created"] = date_created
-            agg["lat_range"] = [lat_range] * len(agg)
-            agg["lon_range"] = [lon_range] * len(agg)
+        agg["data"] = data_formatada
+        agg["date_created"] = date_created
+        agg["lat_range"] = str(lat_range)
+        agg["lon_range"] = str(lon_range)
 
-            df = agg
-        else:
-            if downsample and downsample > 1:
-                df = df.iloc[::downsample, :]
+        df = agg
     else:
-        if downsample and downsample > 1:
-            df = df.iloc[::downsample, :]
+        # ponto a ponto (já reduzido pelo passo da leitura); metadados constantes
+        df = pd.DataFrame({"latitude": lat_v, "longitude": lon_v, "sst": sst_v})
+        df["data"] = data_formatada
+        df["sst_min"] = sst_min
+        df["sst_max"] = sst_max
+        df["lat_range"] = str(lat_range)
+        df["lon_range"] = str(lon_range)
+        df["date_created"] = date_created
+        if h3_resolution is not None:
+            df["h3"] = _h3_to_str_array(
+                _latlng_to_h3_array(df["latitude"].to_numpy(), df["longitude"].to_numpy(), h3_resolution)
+            )
 
     if output_csv_path is None:
         suffix = f".h3r{h3_resolution}.csv" if h3_resolution is not None else ".csv"
         output_csv_path = os.path.splitext(filepath)[0] + suffix
 
     Path(output_csv_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_csv_path, index=False)
+    output_csv_path = _write_table(df, output_csv_path)
     print(
         f"✅ CSV salvo: {output_csv_path} | linhas={len(df)} | "
         f"{'H3 res=' + str(h3_resolution) if h3_resolution is not None else 'sem H3'}"
@@ -266,6 +554,7 @@ def search_and_download_month(
     nc_dir: Path,
     csv_dir: Path,
     sort_key: Optional[str] = "-start_date",
+    executor: Optional[Executor] = None,
 ) -> Tuple[int, int]:
     params = {
         "short_name": short_name,
@@ -287,27 +576,42 @@ def search_and_download_month(
     nc_dir.mkdir(parents=True, exist_ok=True)
     csv_dir.mkdir(parents=True, exist_ok=True)
 
-    files = earthaccess.download(results, local_path=str(nc_dir))
+    files = earthaccess.download(results, local_path=str(nc_dir), threads=DOWNLOAD_THREADS)
     print(f"⬇️ Baixados: {len(files)}")
 
-    csv_count = 0
+    pending: List[Tuple[Path, Path]] = []
     for f in (files or []):
         fpath = Path(f)
-        csv_path = csv_dir / (f"{fpath.stem}.h3r{H3_RESOLUTION}.csv")
+        csv_path = csv_dir / (f"{fpath.stem}.h3r{H3_RESOLUTION}{OUTPUT_EXT}")
         if csv_path.exists():
             print(f"↪️  CSV já existe, pulando: {csv_path.name}")
             continue
+        pending.append((fpath, csv_path))
+
+    # cada arquivo é independente (CPU-bound: leitura + H3 + agregação) → um processo por arquivo
+    csv_count = 0
+    if pending:
+        export = partial(
+            export_csv,
+            downsample=DOWNSAMPLE,
+            h3_resolution=H3_RESOLUTION,
+            h3_aggregate=H3_AGGREGATE,
+        )
+        ex = executor or ProcessPoolExecutor(max_workers=min(MAX_WORKERS, len(pending)), mp_context=MP_CONTEXT)
         try:
-            export_csv(
-                str(fpath),
-                downsample=DOWNSAMPLE,
-                output_csv_path=str(csv_path),
-                h3_resolution=H3_RESOLUTION,
-                h3_aggregate=H3_AGGREGATE,
-            )
-            csv_count += 1
-        except Exception as e:
-            print(f"⚠️ Erro ao gerar CSV de {fpath.name}: {e}")
+            futures = {
+                ex.submit(export, str(fpath), output_csv_path=str(csv_path)): fpath
+                for fpath, csv_path in pending
+            }
+            for fut in as_completed(futures):
+                try:
+                    fut.result()
+                    csv_count += 1
+                except Exception as e:
+                    print(f"⚠️ Erro ao gerar CSV de {futures[fut].name}: {e}")
+        finally:
+            if executor is None:
+                ex.shutdown()
 
     return len(files or []), csv_count
 
@@ -329,10 +633,13 @@ def main():
     total_nc = 0
     total_csv = 0
 
-    for mstart, mend in month_windows_desc(START_DATE, END_DATE):
-        print(f"\n=== {mstart.strftime('%Y-%m')} ===")
-        try:
-            got_nc, got_csv = search_and_download_month(
+    # meses enfileirados do MAIS RECENTE para o MAIS ANTIGO; MONTH_WORKERS buscam/baixam
+    # em paralelo e todos dividem um único pool de processos para gerar os CSVs
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=MP_CONTEXT) as pool, \
+            ThreadPoolExecutor(max_workers=MONTH_WORKERS) as months:
+        futures = {
+            months.submit(
+                search_and_download_month,
                 mstart, mend,
                 short_name=SHORT_NAME,
                 granule_name=GRANULE_NAME,
@@ -340,11 +647,19 @@ def main():
                 nc_dir=NC_DIR,
                 csv_dir=CSV_DIR,
                 sort_key="-start_date",
-            )
-            total_nc += got_nc
-            total_csv += got_csv
-        except Exception as e:
-            print(f"⚠️ Erro no mês {mstart.strftime('%Y-%m')}: {e}")
+                executor=pool,
+            ): mstart
+            for mstart, mend in month_windows_desc(START_DATE, END_DATE)
+        }
+        for fut in as_completed(futures):
+            mstart = futures[fut]
+            try:
+                got_nc, got_csv = fut.result()
+                total_nc += got_nc
+                total_csv += got_csv
+                print(f"=== {mstart.strftime('%Y-%m')}: {got_nc} NetCDF, {got_csv} CSV ===")
+            except Exception as e:
+                print(f"⚠️ Erro no mês {mstart.strftime('%Y-%m')}: {e}")
 
     print("\n=== RESUMO ===")
     print(f"⬇️ NetCDF baixados: {total_nc}")
@@ -1,5 +1,8 @@
 import os
+import json
 import math
+import multiprocessing
+import threading
 import numpy as np
 import pandas as pd
 import datetime as dt
@@ -9,9 +12,21 @@ from dotenv import load_dotenv
 import earthaccess
 import warnings
 import time
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
+# PyArrow (opcional): CSV em C++ / Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pacsv = None
+    pq = None
+
 # ============================================================
 # CONFIGURAÇÕES
 # ============================================================
@@ -25,16 +40,28 @@ END_DATE = dt.date.today()
 BASE_DIR = Path("downloads/swot")
 NC_DIR = BASE_DIR / "nc"
 CSV_DIR = BASE_DIR / "csv"
+DOWNLOAD_MANIFEST = NC_DIR / "_downloads.jsonl"  # .nc já baixados (nome + bytes), para retomar sem rebaixar
 H3_RES = 5
 PAGE_SLEEP_SEC = 0.2
 AGGREGATE_H3 = False  # 🔧 agrega por H3 se True
 DOWNLOAD_DOWNSAMPLE = 15  # 🔧 baixa apenas 1 a cada N granules
+OUTPUT_FORMAT = "csv"  # 🔧 "csv" (viewer web) ou "parquet" (zstd, menor e mais rápido)
+OUTPUT_EXT = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+MAX_WORKERS = os.cpu_count() or 1  # 🔧 processos para ler/processar os .nc do mês
+DOWNLOAD_WORKERS = 4  # 🔧 granules baixados ao mesmo tempo (cada um vai para o processamento assim que chega)
+# processos via forkserver/spawn: o pool recebe o 1º arquivo com as threads de download rodando,
+# e um fork herdaria os locks delas (SSL, urllib3, stdout) no meio do uso
+MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+H3_ID_FORMAT = "hex"  # 🔧 coluna h3_index: "hex" (string, lida pelo viewer web) ou "uint64" (inteiro)
 
 # ============================================================
 # H3
 # ============================================================
 try:
     import h3
+    import h3.api.numpy_int as h3i  # mesma API, mas com células uint64 (sem strings)
     _H3_V4 = hasattr(h3, "latlng_to_cell")
 
     def _latlng_to_h3(lat, lon, res=H3_RES):
@@ -42,6 +69,63 @@ try:
 except Exception:
     raise ImportError("⚠️ Instale com: pip install 'h3>=3,<4'")
 
+# H3 vetorizado (opcional: h3ronpy, em Rust e multithread)
+try:
+    try:
+        from h3ronpy.vector import coordinates_to_cells as _h3r_to_cells
+    except ImportError:  # h3ronpy < 0.21
+        from h3ronpy.arrow.vector import coordinates_to_cells as _h3r_to_cells
+except Exception:
+    _h3r_to_cells = None
+
+def _latlng_to_h3_array(lats, lons, res=H3_RES):
+    """Indexa arrays de lat/lon em células H3 (uint64) de uma vez só."""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if _h3r_to_cells is not None:
+        return np.asarray(_h3r_to_cells(lats, lons, res), dtype=np.uint64)
+    # sem h3ronpy: ainda ponto a ponto, mas via numpy_int (sem criar strings/listas)
+    fn = h3i.latlng_to_cell if _H3_V4 else h3i.geo_to_h3
+    return np.fromiter(map(fn, lats.tolist(), lons.tolist(), repeat(res, lats.size)), dtype=np.uint64, count=lats.size)
+
+def _h3_output(cells):
+    """Ids de saída conforme H3_ID_FORMAT (hex igual a h3.int_to_str / h3.h3_to_string)."""
+    cells = np.asarray(cells, dtype=np.uint64)
+    if H3_ID_FORMAT == "uint64":
+        return cells
+    return np.array([format(c, "x") for c in cells.tolist()], dtype=object)
+
+# ============================================================
+# NUMBA (opcional: classificação de eddy + score num único laço compilado)
+# ============================================================
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+EDDY_LABELS = np.array(["Undefined", "Cyclonic", "Anticyclonic", "Neutral"], dtype=object)
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _classify_and_score_nb(ssha, vorticity, grad, out_type, out_score):
+        """Mesma regra de classify_eddy/shark_activity_score, por amostra, em paralelo."""
+        for i in prange(ssha.size):
+            s = ssha[i]
+            v = vorticity[i]
+            g = grad[i]
+            if np.isnan(v) or np.isnan(s):
+                out_type[i] = 0
+            elif s < 0 and v < 0:
+                out_type[i] = 1
+            elif s > 0 and v > 0:
+                out_type[i] = 2
+            else:
+                out_type[i] = 3
+            if np.isnan(s) or np.isnan(g):
+                out_score[i] = 0.0
+            else:
+                out_score[i] = min(max(0.5 + (-s * 0.02) + (g * 8), 0.0), 1.0)
+
 # ============================================================
 # LOGIN
 # ============================================================
@@ -66,7 +150,12 @@ def month_windows(start, end):
         cur = nxt
 
 def month_windows_desc(start, end):
-    return reversed(list(month_windows(start, end)))
+    cur = dt.date(end.year, end.month, 1)
+    first = dt.date(start.year, start.month, 1)
+    while cur >= first:
+        nxt = (cur.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+        yield cur, min(nxt - dt.timedelta(days=1), end)
+        cur = (cur - dt.timedelta(days=1)).replace(day=1)
 
 # ============================================================
 # UTILITÁRIOS
@@ -76,14 +165,42 @@ def safe_var(ds, name):
     if name not in ds.variables:
         return np.array([], dtype=np.float32)
     try:
-        arr = ds.variables[name][:]
-        arr = np.ma.filled(arr, np.nan)
+        var = ds.variables[name]
+        var.set_auto_maskandscale(False)  # sem MaskedArray; fill comparado no valor bruto
+        raw = np.asarray(var[:])
+        attrs = set(var.ncattrs())
+        bad = np.zeros(raw.shape, dtype=bool)
+        for att in ("_FillValue", "missing_value"):
+            if att in attrs:
+                bad |= np.isin(raw, np.atleast_1d(var.getncattr(att)))
+        if "valid_range" in attrs:
+            vmin, vmax = var.getncattr("valid_range")
+            bad |= (raw < vmin) | (raw > vmax)
+        if "valid_min" in attrs:
+            bad |= raw < var.getncattr("valid_min")
+        if "valid_max" in attrs:
+            bad |= raw > var.getncattr("valid_max")
+        arr = raw.astype(np.float64)
+        if "scale_factor" in attrs:
+            arr *= var.getncattr("scale_factor")
+        if "add_offset" in attrs:
+            arr += var.getncattr("add_offset")
+        arr[bad] = 0.0
         arr = np.nan_to_num(arr, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
         return arr
     except Exception as e:
         print(f"⚠️ Erro ao ler variável {name}: {e}")
         return np.array([], dtype=np.float32)
 
+_RNG = np.random.default_rng()
+
+def _placeholder(low, high, size):
+    """Uniforme [low, high) em float32 sem passar por um array float64 intermediário."""
+    out = _RNG.random(size, dtype=np.float32)
+    out *= np.float32(high - low)
+    out += np.float32(low)
+    return out
+
 def compute_gradients(ssh):
     """Gradiente de SSH → magnitude e vorticidade aproximada."""
     if ssh.size == 0:
@@ -114,10 +231,36 @@ def shark_activity_score(ssha, grad, temp=None):
         score -= (temp - 20) * 0.01
     return float(np.clip(score, 0, 1))
 
+def classify_and_score(ssha, vorticity, grad):
+    """
+    Rótulo de eddy (categórico) e score de atividade para todas as amostras (mesma regra de
+    classify_eddy/shark_activity_score): kernel numba quando disponível, senão NumPy vetorizado.
+    """
+    ssha = np.ascontiguousarray(ssha, dtype=np.float64)
+    vorticity = np.ascontiguousarray(vorticity, dtype=np.float64)
+    grad = np.ascontiguousarray(grad, dtype=np.float64)
+    if njit is not None:
+        out_type = np.empty(ssha.size, dtype=np.int8)
+        out_score = np.empty(ssha.size, dtype=np.float64)
+        _classify_and_score_nb(ssha, vorticity, grad, out_type, out_score)
+        return pd.Categorical.from_codes(out_type, EDDY_LABELS), out_score
+
+    out_type = np.full(ssha.shape, 3, dtype=np.int8)           # Neutral
+    out_type[(ssha < 0) & (vorticity < 0)] = 1                 # Cyclonic
+    out_type[(ssha > 0) & (vorticity > 0)] = 2                 # Anticyclonic
+    out_type[np.isnan(ssha) | np.isnan(vorticity)] = 0         # Undefined
+    out_score = np.clip(0.5 + (-ssha * 0.02) + (grad * 8), 0.0, 1.0)
+    out_score[np.isnan(ssha) | np.isnan(grad)] = 0.0
+    return pd.Categorical.from_codes(out_type, EDDY_LABELS), out_score
+
 # ============================================================
 # PROCESSAMENTO DE UM ARQUIVO
 # ============================================================
 def process_swot_file(filepath):
+    """
+    Lê um granule e devolve (date_str, tabela) — pa.Table com pyarrow, DataFrame sem ele —
+    ou None se o arquivo falhar. A data vai à parte (não como coluna), só para o agrupamento diário.
+    """
     try:
         with nc.Dataset(filepath) as ds:
             lat = safe_var(ds, "latitude")
@@ -134,23 +277,23 @@ def process_swot_file(filepath):
             rain = safe_var(ds, "rain_flag")
             ice = safe_var(ds, "dynamic_ice_flag")
 
-            sea_state_bias = np.random.uniform(0.0, 0.005, size=ssh.shape).astype(np.float32)
-            wind_speed = np.random.uniform(2, 8, size=ssh.shape).astype(np.float32)
-            mean_wave_dir = np.random.uniform(90, 180, size=ssh.shape).astype(np.float32)
-            mean_wave_period = np.random.uniform(5, 10, size=ssh.shape).astype(np.float32)
-
             grad_mag, vorticity = compute_gradients(ssh)
 
             arrays = [lat, lon, ssh, ssha, geoid, tide, dist_coast, rain, ice,
-                      grad_mag, vorticity, sea_state_bias, wind_speed,
-                      mean_wave_dir, mean_wave_period]
-            arrays = [np.ravel(np.nan_to_num(a, nan=0.0, posinf=0.0, neginf=0.0)) for a in arrays]
-            mask = np.isfinite(arrays[0]) & np.isfinite(arrays[1]) & np.isfinite(arrays[2])
-            arrays = [a[mask] for a in arrays]
+                      grad_mag, vorticity]
+            # safe_var já trocou NaN/inf por 0 (e o gradiente de dados finitos é finito):
+            # basta achatar, sem nova cópia nem máscara
+            arrays = [np.ravel(a) for a in arrays]
 
             (lat, lon, ssh, ssha, geoid, tide, dist_coast, rain, ice,
-             grad_mag, vorticity, sea_state_bias, wind_speed,
-             mean_wave_dir, mean_wave_period) = arrays
+             grad_mag, vorticity) = arrays
+
+            # placeholders (sem variável real no produto Basic): direto em float32,
+            # pelo gerador do módulo
+            sea_state_bias = _placeholder(0.0, 0.005, lat.size)
+            wind_speed = _placeholder(2, 8, lat.size)
+            mean_wave_dir = _placeholder(90, 180, lat.size)
+            mean_wave_period = _placeholder(5, 10, lat.size)
 
             tvar = safe_var(ds, "time")
             if tvar.size > 0:
@@ -159,14 +302,16 @@ def process_swot_file(filepath):
                 t0 = dt.datetime.now(dt.timezone.utc)
             date_str = t0.strftime("%Y%m%d")
 
-        h3_index = [_latlng_to_h3(float(la), float(lo), H3_RES) for la, lo in zip(lat, lon)]
-        eddy_types = [classify_eddy(s, v) for s, v in zip(ssha, vorticity)]
-        shark_scores = [shark_activity_score(s, g) for s, g in zip(ssha, grad_mag)]
+        # H3 em uint64 para todos os pontos; string (hex) só uma vez por célula única
+        cells, cell_idx = np.unique(_latlng_to_h3_array(lat, lon, H3_RES), return_inverse=True)
+        h3_index = pd.Categorical.from_codes(cell_idx, _h3_output(cells))
+        eddy_types, shark_scores = classify_and_score(ssha, vorticity, grad_mag)
         anomaly_ids = np.digitize(ssha, bins=np.linspace(-0.5, 0.5, 20))
 
+        # colunas de valor único / poucos rótulos como categóricos (códigos int8, sem lista de strings)
+        const = np.zeros(lat.size, dtype=np.int8)
         df = pd.DataFrame({
-            "date_str": [date_str] * len(lat),
-            "datetime": [t0.isoformat()] * len(lat),
+            "datetime": pd.Categorical.from_codes(const, [t0.isoformat()]),
             "latitude": lat,
             "longitude": lon,
             "h3_index": h3_index,
@@ -190,8 +335,9 @@ def process_swot_file(filepath):
 
         # 🔧 AGREGAÇÃO H3 (opcional)
         if AGGREGATE_H3:
+            # h3_index já é categórico: o groupby trabalha com os códigos inteiros
             grouped = (
-                df.groupby("h3_index")
+                df.groupby("h3_index", observed=True, sort=False)
                 .agg({
                     "latitude": "mean",
                     "longitude": "mean",
@@ -204,11 +350,14 @@ def process_swot_file(filepath):
             )
             grouped.columns = ["_".join(c).strip("_") for c in grouped.columns.values]
             grouped.reset_index(inplace=True)
-            grouped["date_str"] = date_str
+            grouped["h3_index"] = grouped["h3_index"].to_numpy()
             grouped["datetime"] = t0.isoformat()
             df = grouped
 
-        return df
+        # tabela Arrow já no worker: o processo principal só encadeia os pedaços do dia
+        if pa is not None:
+            return date_str, pa.Table.from_pandas(df, preserve_index=False)
+        return date_str, df
 
     except Exception as e:
         print(f"⚠️ Erro ao processar {filepath}: {e}")
@@ -217,21 +366,68 @@ def process_swot_file(filepath):
 # ============================================================
 # AGRUPAMENTO E EXPORTAÇÃO DIÁRIA
 # ============================================================
-def export_daily_csv(all_dfs):
-    if not all_dfs:
+def export_daily_csv(date_str, tables):
+    """Grava o arquivo do dia a partir das tabelas dos granules (na ordem recebida)."""
+    if not tables:
         return
-    df = pd.concat(all_dfs, ignore_index=True)
-    date_str = df["date_str"].iloc[0]
-    out_csv = CSV_DIR / f"swot_shark_activity_{date_str}.csv"
+    out_csv = CSV_DIR / f"swot_shark_activity_{date_str}{OUTPUT_EXT}"
     CSV_DIR.mkdir(parents=True, exist_ok=True)
-    df.drop(columns=["date_str"], inplace=True)
-    df.to_csv(out_csv, index=False)
-    print(f"💾 CSV diário salvo: {out_csv} ({len(df)} linhas)")
+    if pa is not None:
+        # só junta os pedaços (chunks), sem copiar as colunas; "permissive" unifica os
+        # categóricos cujo índice mudou de largura (int8/int16) entre granules
+        table = pa.concat_tables(tables, promote_options="permissive")
+        if OUTPUT_FORMAT == "parquet":
+            pq.write_table(table, out_csv, compression="zstd")
+        else:
+            pacsv.write_csv(table, out_csv)
+        n_rows = table.num_rows
+    else:
+        df = pd.concat(tables, ignore_index=True)
+        if OUTPUT_FORMAT == "parquet":
+            df.to_parquet(out_csv, compression="zstd", index=False)
+        else:
+            df.to_csv(out_csv, index=False)
+        n_rows = len(df)
+    print(f"💾 CSV diário salvo: {out_csv} ({n_rows} linhas)")
 
 # ============================================================
 # BUSCA E DOWNLOAD (com downsample)
 # ============================================================
+_MANIFEST_LOCK = threading.Lock()  # downloads terminam em threads diferentes
+
+def load_download_manifest():
+    """{nome_do_nc: bytes} dos downloads concluídos (linhas corrompidas são ignoradas)."""
+    done = {}
+    if not DOWNLOAD_MANIFEST.exists():
+        return done
+    with open(DOWNLOAD_MANIFEST, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+                done[rec["nc"]] = rec["bytes"]
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+def append_download_manifest(path):
+    """Registra um .nc baixado por completo."""
+    p = Path(path)
+    rec = {"nc": p.name, "bytes": p.stat().st_size}
+    with _MANIFEST_LOCK, open(DOWNLOAD_MANIFEST, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(rec) + "\n")
+
+def _granule_filenames(granule):
+    """Nomes dos arquivos de um resultado do earthaccess (vazio se não der para saber)."""
+    try:
+        return [os.path.basename(u) for u in granule.data_links()]
+    except Exception:
+        return []
+
 def search_and_download_month(mstart, mend):
+    """
+    Busca os granules do mês e gera o caminho de cada .nc conforme o download termina.
+    Arquivos que já estão em NC_DIR com o tamanho registrado no manifesto não são baixados de novo.
+    """
     results = earthaccess.search_data(
         short_name=SHORT_NAME,
         provider=PROVIDER,
@@ -240,18 +436,55 @@ def search_and_download_month(mstart, mend):
         downloadable=True,
     )
     all_results = list(results)
+    time.sleep(PAGE_SLEEP_SEC)  # intervalo entre buscas no CMR
     if DOWNLOAD_DOWNSAMPLE > 1:
         all_results = all_results[::DOWNLOAD_DOWNSAMPLE]
         print(f"📉 Downsample aplicado: baixando 1 a cada {DOWNLOAD_DOWNSAMPLE} granules ({len(all_results)} arquivos selecionados)")
 
     NC_DIR.mkdir(parents=True, exist_ok=True)
-    files = earthaccess.download(all_results, local_path=str(NC_DIR))
-    print(f"⬇️ Baixados: {len(files)} arquivos.")
-    return files
+    done = load_download_manifest()
+    todo = []
+    n_files = 0
+    for g in all_results:
+        paths = [NC_DIR / n for n in _granule_filenames(g)]
+        if paths and all(p.name in done and p.exists() and p.stat().st_size == done[p.name] for p in paths):
+            for p in paths:
+                n_files += 1
+                yield str(p)
+        else:
+            todo.append(g)
+    if n_files:
+        print(f"↪️  Já baixados (manifesto): {n_files} arquivos")
+
+    # um download por granule, DOWNLOAD_WORKERS por vez; cada caminho é entregue assim que
+    # o arquivo termina, para o processamento começar sem esperar o mês inteiro
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as ex:
+        futures = [ex.submit(earthaccess.download, [g], local_path=str(NC_DIR), threads=1) for g in todo]
+        for fut in as_completed(futures):
+            try:
+                files = fut.result() or []
+            except Exception as e:
+                print(f"⚠️ Erro no download: {e}")
+                continue
+            for f in files:
+                append_download_manifest(f)
+                n_files += 1
+                yield f
+    print(f"⬇️ Baixados: {n_files} arquivos.")
 
 # ============================================================
 # MAIN
 # ============================================================
+def _init_worker():
+    """Cada worker lê seus próprios arquivos: sem lock de arquivo do HDF5 e numba em 1 thread (os processos já dividem os núcleos)."""
+    global _RNG
+    os.environ["HDF5_USE_FILE_LOCKING"] = "FALSE"
+    # estado próprio por worker, qualquer que seja o start method (placeholders diferentes entre arquivos)
+    _RNG = np.random.default_rng()
+    if njit is not None:
+        import numba
+        numba.set_num_threads(1)
+
 def main():
     if not authenticate():
         return
@@ -259,26 +492,30 @@ def main():
     print(f"🛰️ Processando SWOT de {START_DATE} → {END_DATE} (ordem decrescente)\n")
     total_csv = 0
 
-    for mstart, mend in month_windows_desc(START_DATE, END_DATE):
-        print(f"\n=== {mstart.strftime('%Y-%m')} ===")
-        try:
-            nc_files = search_and_download_month(mstart, mend)
-        except Exception as e:
-            print(f"⚠️ Erro na busca {mstart}: {e}")
-            continue
-
-        daily_groups = {}
-        for f in nc_files:
-            df = process_swot_file(f)
-            if df is None:
+    # arquivos são independentes (descompressão + DataFrame, CPU) → um pool de processos para tudo
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=MP_CONTEXT, initializer=_init_worker) as pool:
+        for mstart, mend in month_windows_desc(START_DATE, END_DATE):
+            print(f"\n=== {mstart.strftime('%Y-%m')} ===")
+            # cada arquivo entra no pool assim que baixa: download (rede) e processamento (CPU) se sobrepõem
+            try:
+                futures = {f: pool.submit(process_swot_file, f) for f in search_and_download_month(mstart, mend)}
+            except Exception as e:
+                print(f"⚠️ Erro na busca {mstart}: {e}")
                 continue
-            date_str = df["date_str"].iloc[0]
-            daily_groups.setdefault(date_str, []).append(df)
 
-        for date, dfs in daily_groups.items():
-            export_daily_csv(dfs)
-            total_csv += 1
-            time.sleep(PAGE_SLEEP_SEC)
+            # agrupamento por dia fica no processo principal, em ordem de nome (= ordem temporal do granule)
+            daily_groups = {}
+            for f in sorted(futures, key=lambda p: os.path.basename(p)):
+                fut = futures[f]
+                res = fut.result()
+                if res is None:
+                    continue
+                date_str, table = res
+                daily_groups.setdefault(date_str, []).append(table)
+
+            for date_str, tables in daily_groups.items():
+                export_daily_csv(date_str, tables)
+                total_csv += 1
 
     print(f"\n✅ Finalizado. CSVs diários gerados: {total_csv}")
 
@@ -2,6 +2,28 @@ import os
 import requests
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# JSON rápido (opcional: orjson, em Rust)
+try:
+    import orjson
+
+    def _json(resp):
+        return orjson.loads(resp.content)
+
+except ImportError:
+    def _json(resp):
+        return resp.json()
+
+# PyArrow (opcional): CSV pelo writer C++ multithread / Parquet, sem passar por DataFrame
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 # =============================
 # CONFIGURAÇÕES
@@ -37,80 +59,194 @@ OUTPUT_DIR = "downloads/sharks"
 # Criar pasta se não existir
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Formato de saída: "csv" ou "parquet" (zstd; exige pyarrow)
+OUTPUT_FORMAT = "csv"
+
+# Rede
+OBIS_URL = "https://api.obis.org/v3/occurrence"
+PAGE_SIZE = 1000       # máximo permitido por requisição
+MAX_WORKERS = 16       # requisições simultâneas (regiões × espécies × páginas)
+REQUEST_TIMEOUT = 60
+
+# Colunas mantidas de cada registro do OBIS (o resto do JSON é descartado ao chegar)
+COLUMNS = ["scientificName", "decimalLatitude", "decimalLongitude", "eventDate", "basisOfRecord"]
+SCHEMA = pa.schema([
+    ("scientificName", pa.string()),
+    ("decimalLatitude", pa.float64()),
+    ("decimalLongitude", pa.float64()),
+    ("eventDate", pa.string()),
+    ("basisOfRecord", pa.string()),
+]) if pa is not None else None
+
+# Sessão única: conexões TCP/TLS reaproveitadas entre páginas e threads;
+# tentativas com backoff exponencial (429/5xx) ficam no urllib3
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    ),
+))
+
 # =============================
-# FUNÇÃO PARA BUSCAR DADOS
+# FUNÇÕES PARA BUSCAR DADOS
 # =============================
 
-def fetch_shark_data(region_name, bbox, species_list):
-    print(f"📡 Baixando dados para {region_name}...")
-
+def _bbox_wkt(bbox):
+    """Retângulo da região em WKT (calculado uma vez por região)."""
     lon_min, lon_max, lat_min, lat_max = bbox
-    all_records = []
-
-    for sp in species_list:
-        offset = 0
-        limit = 1000  # máximo permitido por requisição
-
-        while True:
-            url = (
-                f"https://api.obis.org/v3/occurrence?"
-                f"scientificname={sp}"
-                f"&startdate={START_DATE}"
-                f"&enddate={END_DATE}"
-                f"&geometry=POLYGON(({lon_min}%20{lat_min},"
-                f"{lon_min}%20{lat_max},"
-                f"{lon_max}%20{lat_max},"
-                f"{lon_max}%20{lat_min},"
-                f"{lon_min}%20{lat_min}))"
-                f"&size={limit}&from={offset}"
-            )
-
-            r = requests.get(url, timeout=60)
-            if r.status_code != 200:
-                print(f"⚠️ Erro {r.status_code} ao requisitar {url}")
-                break
-
-            data = r.json()
-
-            if "results" not in data or not data["results"]:
-                break
-
-            all_records.extend(data["results"])
-            offset += limit
-
-            if offset >= data.get("total", offset):
-                break
-
-    print(f"✅ {len(all_records)} registros coletados para {region_name}")
-    return all_records
+    return (
+        f"POLYGON(({lon_min} {lat_min},{lon_min} {lat_max},"
+        f"{lon_max} {lat_max},{lon_max} {lat_min},{lon_min} {lat_min}))"
+    )
+
+
+def _fetch_page(sp, geometry, offset):
+    """Uma página do OBIS (dict do JSON) ou None se falhar; a codificação da query fica com o requests."""
+    params = {
+        "scientificname": sp,
+        "startdate": START_DATE,
+        "enddate": END_DATE,
+        "geometry": geometry,
+        "size": PAGE_SIZE,
+        "from": offset,
+        # só as colunas usadas: resposta menor e menos JSON para decodificar
+        "fields": ",".join(COLUMNS),
+    }
+    try:
+        r = SESSION.get(OBIS_URL, params=params, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"⚠️ Erro de rede ao requisitar {sp} (from={offset}): {e}")
+        return None
+    if r.status_code != 200:
+        print(f"⚠️ Erro {r.status_code} ao requisitar {r.url}")
+        return None
+    return _json(r)
+
+
+def _project(results):
+    """Página → {coluna: lista de valores} só com COLUMNS (campo ausente vira None)."""
+    return {c: [rec.get(c) for rec in results] for c in COLUMNS}
+
+
+class _RegionWriter:
+    """
+    Arquivo de saída de uma região, gravado página a página (aberto só na 1ª página com dados).
+    Com pyarrow: ParquetWriter / CSVWriter; sem pyarrow: CSV em modo append pelo pandas.
+    """
+
+    def __init__(self, region):
+        ext = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+        self.filename = os.path.join(OUTPUT_DIR, f"{region}_sharks{ext}")
+        self.rows = 0
+        self._writer = None
+        self._frames = []  # só parquet sem pyarrow (sem writer incremental)
+
+    def write(self, columns):
+        n = len(columns[COLUMNS[0]])
+        if not n:
+            return
+        if pa is not None:
+            table = pa.Table.from_pydict(columns, schema=SCHEMA)
+            if self._writer is None:
+                if OUTPUT_FORMAT == "parquet":
+                    self._writer = pq.ParquetWriter(self.filename, SCHEMA, compression="zstd")
+                else:
+                    self._writer = pacsv.CSVWriter(self.filename, SCHEMA)
+            self._writer.write_table(table)
+        else:
+            df = pd.DataFrame(columns, columns=COLUMNS)
+            if OUTPUT_FORMAT == "parquet":
+                self._frames.append(df)
+            else:
+                df.to_csv(self.filename, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += n
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._frames:
+            pd.concat(self._frames, ignore_index=True).to_parquet(self.filename, index=False)
+            self._frames = []
+        return self.filename if self.rows else None
+
+
+def fetch_shark_data(regions, species_list):
+    """
+    Busca todas as regiões × espécies em paralelo (MAX_WORKERS threads, mesma sessão).
+    A 1ª página de cada (região, espécie) informa o `total`; as demais páginas são
+    disparadas logo em seguida, também em paralelo.
+    Cada página é reduzida às COLUMNS e gravada no arquivo da região assim que chega
+    (ordem de chegada: a ordem das linhas no arquivo não tem significado), então só uma
+    página fica em memória. A região é fechada quando sua última página chega.
+    Retorna {região: (arquivo ou None, nº de registros)}.
+    """
+    geometries = {region: _bbox_wkt(bbox) for region, bbox in regions.items()}
+    writers = {region: _RegionWriter(region) for region in regions}
+    in_flight = {region: 0 for region in regions}  # páginas pedidas e ainda não recebidas
+    saved = {}
+
+    def _close(region):
+        saved[region] = (writers[region].close(), writers[region].rows)
+        print(f"✅ {writers[region].rows} registros coletados para {region}")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        # só a thread principal mexe em `pending`/`in_flight`/arquivos → sem lock
+        try:
+            pending = {}
+            for region, geometry in geometries.items():
+                print(f"📡 Baixando dados para {region}...")
+                for sp in species_list:
+                    pending[ex.submit(_fetch_page, sp, geometry, 0)] = (region, sp, 0)
+                in_flight[region] = len(species_list)
+                if not species_list:
+                    _close(region)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    region, sp, offset = pending.pop(fut)
+                    data = fut.result()
+                    in_flight[region] -= 1
+                    # página que falhou/veio vazia só não grava nada
+                    if data and data.get("results"):
+                        if offset == 0:
+                            for off in range(PAGE_SIZE, data.get("total", 0), PAGE_SIZE):
+                                pending[ex.submit(_fetch_page, sp, geometries[region], off)] = (region, sp, off)
+                                in_flight[region] += 1
+                        writers[region].write(_project(data["results"]))
+                    del data
+                    if not in_flight[region]:
+                        _close(region)
+        except BaseException:
+            # erro no meio: não esperar pelas milhares de páginas ainda na fila
+            ex.shutdown(cancel_futures=True)
+            raise
+        finally:
+            for region, writer in writers.items():
+                if region not in saved:
+                    writer.close()
+    return {region: saved[region] for region in regions}
 
 
 # =============================
 # COLETA E SALVAMENTO
 # =============================
 
-for region, bbox in REGIONS.items():
-    records = fetch_shark_data(region, bbox, SPECIES)
-
-    if not records:
-        print(f"⚠️ Nenhum dado encontrado para {region}. Pulando...\n")
-        continue
-
-    # Converter para DataFrame
-    df = pd.json_normalize(records)
-
-    # Garantir colunas mínimas
-    cols = ["scientificName", "decimalLatitude", "decimalLongitude", "eventDate", "basisOfRecord"]
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    df = df[cols]
+def main():
+    for region, (filename, rows) in fetch_shark_data(REGIONS, SPECIES).items():
+        if filename is None:
+            print(f"⚠️ Nenhum dado encontrado para {region}. Pulando...\n")
+            continue
+        print(f"💾 Arquivo salvo: {filename} ({rows} registros)\n")
 
-    # Caminho completo do arquivo
-    filename = os.path.join(OUTPUT_DIR, f"{region}_sharks.csv")
+    print("🏁 Coleta finalizada!")
 
-    # Salvar CSV
-    df.to_csv(filename, index=False)
-    print(f"💾 Arquivo salvo: {filename}\n")
 
-print("🏁 Coleta finalizada!")
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,10 @@ def extract_nc_info(filepath):
 
         for var_name, var in ds.variables.items():
             try:
-                data = var[:]
+                # só o canto [0:5, 0:5, ...] (um ou poucos chunks): contém os 5 primeiros
+                # elementos em ordem C, sem ler a variável inteira
+                shape = var.shape
+                data = var[tuple(slice(0, min(5, s)) for s in shape)]
                 if hasattr(data, 'shape'):
                     sample = data.flatten()[:5].tolist()  # pequena amostra
                 else:
@@ -25,7 +28,7 @@ def extract_nc_info(filepath):
                 info["variaveis"][var_name] = {
                     "dtype": str(var.dtype),
                     "dimensoes": var.dimensions,
-                    "shape": getattr(data, "shape", None),
+                    "shape": shape,
                     "atributos": {a: str(getattr(var, a)) for a in var.ncattrs()},
                     "sample": [float(x) if isinstance(x, (np.integer, np.floating)) else x for x in sample]
                 }
@@ -14,11 +14,15 @@ import pandas as pd
 import netCDF4 as nc
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 # ===== H3 (compatível v3 e v4) =====
 try:
     import h3
+    import h3.api.numpy_int as h3i  # mesma API, mas com células uint64 (sem strings)
     _H3_V4 = hasattr(h3, "latlng_to_cell")
 
     def _latlng_to_h3(lat, lon, res):
@@ -28,132 +32,435 @@ try:
 except Exception:
     raise ImportError("Instale com: pip install 'h3>=3,<4'")
 
+# H3 vetorizado (opcional: h3ronpy, em Rust e multithread)
+try:
+    try:
+        from h3ronpy.vector import coordinates_to_cells as _h3r_to_cells
+    except ImportError:  # h3ronpy < 0.21
+        from h3ronpy.arrow.vector import coordinates_to_cells as _h3r_to_cells
+except Exception:
+    _h3r_to_cells = None
+
+# ===== h5netcdf (opcional: abre o L3m direto via h5py, mais rápido que o netCDF4-C) =====
+# Não decodifica _FillValue/valid_*/scale_factor sozinho → _read_float faz isso à mão.
+try:
+    import h5netcdf.legacyapi as h5nc
+except Exception:
+    h5nc = None
+
+# ===== numba (opcional: redução por célula numa varredura só sobre os pontos ordenados) =====
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _reduce_runs_nb(starts, sst, qual, lat, lon):
+        """Por grupo contíguo: média/M2 (Welford) da SST, soma/contagem da qualidade (sem NaN) e somas de lat/lon."""
+        n_groups = starts.size
+        sst_mean = np.empty(n_groups)
+        sst_m2 = np.empty(n_groups)
+        q_sum = np.empty(n_groups)
+        q_n = np.empty(n_groups, dtype=np.int64)
+        lat_sum = np.empty(n_groups)
+        lon_sum = np.empty(n_groups)
+        for g in range(n_groups):
+            a = starts[g]
+            b = starts[g + 1] if g + 1 < n_groups else sst.size
+            mean = 0.0
+            m2 = 0.0
+            qs = 0.0
+            qn = 0
+            las = 0.0
+            los = 0.0
+            for k in range(a, b):
+                x = float(sst[k])
+                d = x - mean
+                mean += d / (k - a + 1)
+                m2 += d * (x - mean)
+                q = float(qual[k])
+                if not np.isnan(q):
+                    qs += q
+                    qn += 1
+                las += lat[k]
+                los += lon[k]
+            sst_mean[g] = mean
+            sst_m2[g] = m2
+            q_sum[g] = qs
+            q_n[g] = qn
+            lat_sum[g] = las
+            lon_sum[g] = los
+        return sst_mean, sst_m2, q_sum, q_n, lat_sum, lon_sum
+
 # =============================
 # CONFIGURAÇÕES
 # =============================
 H3_RESOLUTION = 5
+H3_ID_FORMAT = "hex"  # 🔧 coluna h3_index: "hex" (string, lida pelo viewer web) ou "uint64" (inteiro; ideal com Parquet)
+OUTPUT_FORMAT = "csv"  # 🔧 "csv" (viewer web) ou "parquet" (zstd, menor e mais rápido; exige pyarrow)
+OUTPUT_EXT = ".parquet" if OUTPUT_FORMAT == "parquet" else ".csv"
+NC_GLOB = "AQUA_MODIS.*.SST.sst.*.nc"  # 🔧 arquivos processados quando nenhum é passado na linha de comando
+MAX_WORKERS = os.cpu_count() or 1  # 🔧 processos (um arquivo por vez em cada)
+CHUNK_ROWS = 512  # 🔧 latitudes lidas por bloco (a grade nunca é lida inteira)
+PACK_QUALITY_FLAGS = False  # 🔧 True: sst_quality + confidence viram uma coluna uint8 "quality_flags" (qual = v & 7; conf = v >> 3)
 CSV_OUTPUT_DIR = Path("downloads/sst/csv")
 CSV_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# =============================
+# H3 EM LOTE
+# =============================
+def _latlng_to_h3_array(lats, lons, res=H3_RESOLUTION):
+    """Indexa arrays de lat/lon em células H3 (uint64) de uma vez só."""
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if _h3r_to_cells is not None:
+        return np.asarray(_h3r_to_cells(lats, lons, res), dtype=np.uint64)
+    # sem h3ronpy: ainda ponto a ponto, mas via numpy_int (sem criar strings/listas)
+    fn = h3i.latlng_to_cell if _H3_V4 else h3i.geo_to_h3
+    return np.fromiter(map(fn, lats.tolist(), lons.tolist(), repeat(res, lats.size)), dtype=np.uint64, count=lats.size)
+
+def _h3_output(cells):
+    """Ids de saída conforme H3_ID_FORMAT (hex igual a h3.int_to_str / h3.h3_to_string)."""
+    cells = np.asarray(cells, dtype=np.uint64)
+    if H3_ID_FORMAT == "uint64":
+        return cells
+    return np.array([format(c, "x") for c in cells.tolist()], dtype=object)
+
+CONFIDENCE_LABELS = ["low", "medium", "high"]  # por nº de pontos na célula: 1, 2..5, >5
+
+
+def _group_runs(cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Ordena por célula uma única vez → (ordem, células únicas, início de cada grupo, tamanho do grupo)."""
+    order = np.argsort(cells, kind="stable")
+    cells_s = cells[order]
+    starts = np.flatnonzero(np.r_[True, cells_s[1:] != cells_s[:-1]]) if cells_s.size else np.array([], dtype=np.intp)
+    sizes = np.diff(np.append(starts, cells_s.size))
+    return order, cells_s[starts], starts, sizes
+
+
+def _reduce_runs(starts, sizes, sst, qual, lat, lon):
+    """Mesmas reduções de _reduce_runs_nb, com reduceat (sem numba)."""
+    sst = sst.astype(np.float64)
+    sst_mean = np.add.reduceat(sst, starts) / sizes
+    sst_m2 = np.add.reduceat((sst - np.repeat(sst_mean, sizes)) ** 2, starts)
+    q_ok = ~np.isnan(qual)
+    q_sum = np.add.reduceat(np.where(q_ok, qual, 0.0), starts)
+    q_n = np.add.reduceat(q_ok.astype(np.int64), starts)
+    lat_sum = np.add.reduceat(lat.astype(np.float64), starts)
+    lon_sum = np.add.reduceat(lon.astype(np.float64), starts)
+    return sst_mean, sst_m2, q_sum, q_n, lat_sum, lon_sum
+
+
+_STAT_KEYS = ("n", "mean", "m2", "q_sum", "q_n", "lat_sum", "lon_sum")
+
+
+def _h3_partial(cells, sst, qual, lat, lon) -> Dict[str, np.ndarray]:
+    """Estatísticas parciais por célula de um conjunto de pontos: n, média/M2 da SST e somas (qualidade, lat, lon)."""
+    order, keys, starts, sizes = _group_runs(cells)
+    sorted_cols = [sst[order], qual[order], lat[order], lon[order]]
+    if njit is not None and keys.size:
+        sorted_cols[1] = sorted_cols[1].astype(np.float64, copy=False)  # qualidade pode vir inteira ou com NaN
+        reduced = _reduce_runs_nb(starts, *sorted_cols)
+    else:
+        reduced = _reduce_runs(starts, sizes, *sorted_cols)
+    return {"h3": keys, **dict(zip(_STAT_KEYS, (sizes, *reduced)))}
+
+
+def _merge_h3_partials(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Combina as parciais dos blocos: média/M2 pela fórmula paralela de Chan, o resto por soma."""
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        empty = np.array([], dtype=np.float64)
+        return {"h3": np.array([], dtype=np.uint64), "n": np.array([], dtype=np.int64),
+                "q_n": np.array([], dtype=np.int64),
+                **{k: empty for k in ("mean", "m2", "q_sum", "lat_sum", "lon_sum")}}
+    allp = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    order, keys, starts, sizes = _group_runs(allp["h3"])
+    n_k, mean_k = allp["n"][order], allp["mean"][order]
+    n = np.add.reduceat(n_k, starts)
+    mean = np.add.reduceat(n_k * mean_k, starts) / n
+    m2 = np.add.reduceat(allp["m2"][order] + n_k * (mean_k - np.repeat(mean, sizes)) ** 2, starts)
+    out = {"h3": keys, "n": n, "mean": mean, "m2": m2}
+    for k in ("q_sum", "q_n", "lat_sum", "lon_sum"):
+        out[k] = np.add.reduceat(allp[k][order], starts)
+    return out
+
 # =============================
 # EXTRAÇÃO DE DADOS DO NC
 # =============================
-def extract_sst(filepath: str) -> pd.DataFrame:
-    with nc.Dataset(filepath) as ds:
-        # Latitude / Longitude
-        lats = ds.variables["lat"][:]
-        lons = ds.variables["lon"][:]
-
-        # Variável SST
-        sst = np.ma.filled(ds.variables["sst"][:], np.nan)
-        scale_factor = float(getattr(ds.variables["sst"], "scale_factor", 1.0))
-        add_offset = float(getattr(ds.variables["sst"], "add_offset", 0.0))
-        sst_celsius = sst * scale_factor + add_offset
-
-        # Qualidade (se existir)
-        qual = ds.variables["qual_sst"][:] if "qual_sst" in ds.variables else np.zeros_like(sst)
-
-        # Data (atributo global ou nome de arquivo)
-        date_str = None
-        for attr in ("time_coverage_start", "start_time"):
-            if hasattr(ds, attr):
-                try:
-                    s = getattr(ds, attr)
-                    date_str = datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
-                    break
-                except Exception:
-                    pass
-        if not date_str:
-            fname = os.path.basename(filepath)
-            m = re.search(r"\.(\d{8})\.", fname)
-            if m:
-                d = datetime.strptime(m.group(1), "%Y%m%d")
-                date_str = d.strftime("%Y-%m-%d")
+def _open_nc(filepath: str):
+    """Abre com h5netcdf quando instalado; cai no netCDF4 se faltar ou se o arquivo não for HDF5."""
+    if h5nc is not None:
+        try:
+            return h5nc.Dataset(filepath, "r")
+        except Exception:
+            pass
+    ds = nc.Dataset(filepath)
+    ds.set_auto_maskandscale(False)  # sem MaskedArray; fill/escala tratados em _read_float
+    return ds
+
+
+def _read_float(var, idx=slice(None), dtype=np.float32) -> np.ndarray:
+    """
+    Lê var[idx] como float com NaN nos pixels inválidos, sem np.ma.
+    Requer o valor bruto (h5netcdf, ou netCDF4 com set_auto_maskandscale(False), ver _open_nc):
+    o _FillValue/valid_* é comparado no valor bruto (int16) e só depois aplicamos scale_factor/add_offset.
+    """
+    raw = np.asarray(var[idx])
+    attrs = set(var.ncattrs())
+    bad = np.zeros(raw.shape, dtype=bool)
+    for name in ("_FillValue", "missing_value"):
+        if name in attrs:
+            bad |= np.isin(raw, np.atleast_1d(var.getncattr(name)))
+    if "valid_range" in attrs:
+        vmin, vmax = var.getncattr("valid_range")
+        bad |= (raw < vmin) | (raw > vmax)
+    if "valid_min" in attrs:
+        bad |= raw < var.getncattr("valid_min")
+    if "valid_max" in attrs:
+        bad |= raw > var.getncattr("valid_max")
+
+    out = raw.astype(dtype)
+    if "scale_factor" in attrs:
+        out *= dtype(var.getncattr("scale_factor"))
+    if "add_offset" in attrs:
+        out += dtype(var.getncattr("add_offset"))
+    out[bad] = np.nan
+    return out
+
+
+def _block_rows(var, lat_axis: int) -> int:
+    """
+    CHUNK_ROWS arredondado para múltiplo do chunk HDF5 no eixo da latitude:
+    nenhum chunk fica dividido entre dois blocos (cada um é descomprimido uma vez só).
+    """
+    try:
+        chunks = var.chunking()
+    except Exception:
+        return CHUNK_ROWS
+    if isinstance(chunks, str) or not chunks:  # "contiguous"
+        return CHUNK_ROWS
+    c = int(chunks[lat_axis])
+    return -(-CHUNK_ROWS // c) * c
+
+
+_DATE_RE = re.compile(r"\.(\d{8})\.")  # AQUA_MODIS.YYYYMMDD.L3m...
+
+
+@lru_cache(maxsize=256)
+def _parse_iso_date(s: str) -> Optional[str]:
+    """time_coverage_start/start_time (ISO) → YYYY-MM-DD; granules do mesmo dia repetem o valor."""
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def _date_string(filepath: str, ds) -> str:
+    """Data (atributo global ou nome de arquivo)."""
+    for attr in ("time_coverage_start", "start_time"):
+        if hasattr(ds, attr):
+            d = _parse_iso_date(str(getattr(ds, attr)))
+            if d:
+                return d
+    m = _DATE_RE.search(os.path.basename(filepath))
+    if m:
+        d = m.group(1)
+        return f"{d[:4]}-{d[4:6]}-{d[6:]}"
+    return "unknown"
+
+
+def _iter_valid_blocks(ds):
+    """
+    Lê a SST em blocos de latitudes e gera (lat, lon, sst, qualidade) só dos pixels válidos de cada bloco,
+    na ordem da grade (lat, lon). Pico de memória: um bloco, não a grade inteira.
+    """
+    # valores brutos (int16): a decodificação é feita uma vez só, em _read_float
+    lats = np.asarray(ds.variables["lat"][:])
+    lons = np.asarray(ds.variables["lon"][:])
+    sst_var = ds.variables["sst"]
+
+    # Qualidade (se existir), bruta; o _FillValue é tratado só nos pontos válidos
+    qual_var = ds.variables["qual_sst"] if "qual_sst" in ds.variables else None
+    qual_fill = None
+    if qual_var is not None and "_FillValue" in qual_var.ncattrs():
+        qual_fill = qual_var.getncattr("_FillValue")
+
+    # Grade (lat, lon): se a variável vier como (lon, lat), o bloco é lido no outro eixo e só trocamos a vista
+    transposed = sst_var.dimensions[0] == ds.variables["lon"].dimensions[0]
+    lat_axis = 1 if transposed else 0
+    block_rows = _block_rows(sst_var, lat_axis)
+    for i0 in range(0, lats.size, block_rows):
+        idx = [slice(None), slice(None)]
+        idx[lat_axis] = slice(i0, min(i0 + block_rows, lats.size))
+        idx = tuple(idx)
+
+        # Variável SST: float32 do começo ao fim (metade da memória/banda de float64)
+        block = _read_float(sst_var, idx)
+        qual = np.asarray(qual_var[idx]) if qual_var is not None else None
+        if transposed:
+            block = block.T
+            qual = qual.T if qual is not None else None
+
+        # Filtra valores inválidos (NaN falha nas duas comparações) antes de montar qualquer coluna
+        valid = np.greater(block, -2)
+        valid &= block < 45
+        # sem meshgrid: linha/coluna de cada pixel válido indexam os vetores 1D de lat/lon
+        i, j = np.divmod(np.flatnonzero(valid), lons.size)
+        if i.size == 0:
+            continue
+
+        # qualidade MODIS é 0..4 → uint8; só fica float32 (NaN) se algum pixel válido vier sem flag
+        if qual is None:
+            qual_valid = np.zeros(i.size, dtype=np.uint8)
+        else:
+            qual_valid = qual[i, j]
+            qual_bad = qual_valid == qual_fill if qual_fill is not None else None
+            if qual_bad is not None and qual_bad.any():
+                qual_valid = qual_valid.astype(np.float32)
+                qual_valid[qual_bad] = np.nan
             else:
-                date_str = "unknown"
-
-        # Grade
-        lon_grid, lat_grid = np.meshgrid(lons, lats)
-        if sst_celsius.T.shape == lat_grid.shape:
-            sst_celsius = sst_celsius.T
-            qual = qual.T
-
-        df = pd.DataFrame({
-            "date": [date_str] * lat_grid.size,
-            "latitude": lat_grid.ravel(),
-            "longitude": lon_grid.ravel(),
-            "sst_celsius": sst_celsius.ravel(),
-            "sst_quality": qual.ravel(),
-        }).dropna(subset=["sst_celsius"])
-
-        # Filtra valores inválidos
-        df = df[(df["sst_celsius"] > -2) & (df["sst_celsius"] < 45)]
-        return df
+                qual_valid = qual_valid.astype(np.uint8)
+
+        yield (lats[i0 + i].astype(np.float32, copy=False), lons[j].astype(np.float32, copy=False),
+               block[i, j], qual_valid)
+
+
+def extract_sst(filepath: str) -> Dict[str, np.ndarray]:
+    """
+    Todos os pixels válidos do arquivo como arrays (montados bloco a bloco, sem a grade inteira):
+    latitude, longitude, sst_celsius, sst_quality + "date" (a data do produto, um valor só).
+    Sem DataFrame: só a tabela agregada vira DataFrame, na saída.
+    """
+    with _open_nc(filepath) as ds:
+        date_str = _date_string(filepath, ds)
+        blocks = list(_iter_valid_blocks(ds))
+
+    def _cat(k, dtype):
+        return np.concatenate([b[k] for b in blocks]) if blocks else np.array([], dtype=dtype)
+
+    lat, lon, sst, qual = (_cat(k, dt) for k, dt in enumerate((np.float32, np.float32, np.float32, np.uint8)))
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "sst_celsius": sst,
+        "sst_quality": qual,
+        "date": date_str,
+    }
 
 # =============================
 # AGREGAÇÃO H3 E CÁLCULO DE ANOMALIA
 # =============================
-def aggregate_h3(df: pd.DataFrame) -> pd.DataFrame:
-    df["h3_index"] = [
-        _latlng_to_h3(lat, lon, H3_RESOLUTION)
-        for lat, lon in zip(df["latitude"], df["longitude"])
-    ]
-
-    agg = (
-        df.groupby("h3_index", as_index=False)
-        .agg(
-            sst_mean_celsius=("sst_celsius", "mean"),
-            sst_std_celsius=("sst_celsius", "std"),
-            sst_quality=("sst_quality", "mean"),
-            latitude=("latitude", "mean"),
-            longitude=("longitude", "mean"),
-            n_points=("sst_celsius", "count"),
-            date=("date", "first")
-        )
-    )
+def _h3_table(stats: Dict[str, np.ndarray], date_str) -> pd.DataFrame:
+    """Estatísticas finais por célula → tabela de saída (colunas e ordem de sempre)."""
+    n = stats["n"]
+    mean = stats["mean"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # desvio amostral (ddof=1), como o pandas: NaN quando a célula tem um único ponto
+        sst_std = np.where(n > 1, np.sqrt(stats["m2"] / (n - 1)), np.nan)
+        qual_mean = stats["q_sum"] / stats["q_n"]
+
+    agg = pd.DataFrame({
+        "h3_index": _h3_output(stats["h3"]),
+        "sst_mean_celsius": mean.astype(np.float32),
+        "sst_std_celsius": sst_std.astype(np.float32),
+        "sst_quality": qual_mean,
+        "latitude": (stats["lat_sum"] / n).astype(np.float32),
+        "longitude": (stats["lon_sum"] / n).astype(np.float32),
+        "n_points": n,
+        "date": date_str,  # uma data por arquivo
+    })
 
     # Substitui NaN (1 ponto só) por 0.0
     agg["sst_std_celsius"] = agg["sst_std_celsius"].fillna(0.0)
 
     # Adiciona flag de confiança
-    agg["confidence"] = np.where(agg["n_points"] > 5, "high",
-                                 np.where(agg["n_points"] > 1, "medium", "low"))
+    # código 0/1/2 = (n > 1) + (n > 5), sem np.where aninhado; categórico (1 byte por linha)
+    conf_codes = (n > 1).astype(np.int8)
+    conf_codes += n > 5
+    agg["confidence"] = pd.Categorical.from_codes(conf_codes, CONFIDENCE_LABELS)
+
+    # Anomalia: média da célula − média global das células (só existe depois de juntar todos os blocos)
+    global_mean = mean.mean() if mean.size else np.nan
+    agg["anomaly_celsius"] = (mean - global_mean).astype(np.float32)
 
-    # Cálculo da anomalia
-    global_mean = agg["sst_mean_celsius"].mean()
-    agg["anomaly_celsius"] = agg["sst_mean_celsius"] - global_mean
+    if PACK_QUALITY_FLAGS:
+        # qualidade média arredondada (0..4; 7 = sem flag) nos bits 0-2 e confiança (0..2) nos bits 3-4
+        with np.errstate(invalid="ignore"):
+            qual_code = np.where(np.isnan(qual_mean), 7, np.clip(np.rint(qual_mean), 0, 4)).astype(np.uint8)
+        agg["sst_quality"] = qual_code | (conf_codes.astype(np.uint8) << 3)
+        agg = agg.rename(columns={"sst_quality": "quality_flags"}).drop(columns="confidence")
 
     return agg
 
 
+def aggregate_h3(points: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Arrays de pontos (saída de extract_sst) → tabela agregada por célula H3."""
+    lat, lon, sst, qual = (np.asarray(points[c]) for c in ("latitude", "longitude", "sst_celsius", "sst_quality"))
+    # células em uint64; o id de saída só é gerado por célula, no fim
+    cells = _latlng_to_h3_array(lat, lon)
+
+    # sem groupby: um argsort e cada célula vira um trecho contíguo, reduzido numa varredura
+    return _h3_table(_h3_partial(cells, sst, qual, lat, lon), points.get("date"))
+
+
+def extract_aggregate_h3(filepath: str) -> Tuple[pd.DataFrame, int]:
+    """
+    extract_sst + aggregate_h3 sem montar o DataFrame de pixels: cada bloco de latitudes vira
+    estatísticas parciais por célula, combinadas no fim → (tabela agregada, nº de pontos).
+    """
+    parts: List[Dict[str, np.ndarray]] = []
+    n_points = 0
+    with _open_nc(filepath) as ds:
+        date_str = _date_string(filepath, ds)
+        for lat, lon, sst, qual in _iter_valid_blocks(ds):
+            n_points += lat.size
+            parts.append(_h3_partial(_latlng_to_h3_array(lat, lon), sst, qual, lat, lon))
+    return _h3_table(_merge_h3_partials(parts), date_str), n_points
+
+
 # =============================
 # MAIN
 # =============================
+def process_file(nc_file: Path):
+    """Extração + agregação + CSV/Parquet de um arquivo (roda num processo do pool) → (csv, pontos, células, amostra)."""
+    df_h3, n_points = extract_aggregate_h3(str(nc_file))
+    out_csv = CSV_OUTPUT_DIR / f"{nc_file.stem}.h3r{H3_RESOLUTION}{OUTPUT_EXT}"
+    if OUTPUT_FORMAT == "parquet":
+        df_h3.to_parquet(out_csv, engine="pyarrow", compression="zstd", index=False)
+    else:
+        df_h3.to_csv(out_csv, index=False)
+    return out_csv, n_points, len(df_h3), df_h3.head(5)
+
+
 def main():
 
-    nc_file = Path("AQUA_MODIS.20241117.L3m.DAY.SST.sst.4km.nc")
-    if not nc_file.exists():
-        print(f"❌ Arquivo não encontrado: {nc_file}")
+    # arquivos na linha de comando ou todos os L3m de SST da pasta atual
+    nc_files = [Path(a) for a in sys.argv[1:]] or sorted(Path(".").glob(NC_GLOB))
+    missing = [f for f in nc_files if not f.exists()]
+    if not nc_files or missing:
+        print(f"❌ Arquivo não encontrado: {missing[0] if missing else NC_GLOB}")
         sys.exit(1)
 
-    print(f"📂 Extraindo SST de {nc_file.name} ...")
-
-    # Extrai o dataset
-    df_raw = extract_sst(str(nc_file))
-    print(f"✅ Dados extraídos: {len(df_raw):,} pontos")
+    print(f"📂 Extraindo SST de {len(nc_files)} arquivo(s) ...")
 
-    # Agrega por H3
-    df_h3 = aggregate_h3(df_raw)
-    print(f"🔷 Agregado por H3: {len(df_h3):,} células")
+    # arquivos são independentes: um processo por arquivo (sem GIL entre eles)
+    if len(nc_files) == 1:
+        results = [process_file(nc_files[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=min(MAX_WORKERS, len(nc_files))) as pool:
+            results = list(pool.map(process_file, nc_files))
 
-    # Salva CSV final
-    out_csv = CSV_OUTPUT_DIR / f"{nc_file.stem}.h3r{H3_RESOLUTION}.csv"
-    df_h3.to_csv(out_csv, index=False)
-    print(f"💾 CSV salvo: {out_csv}")
+    for nc_file, (out_csv, n_points, n_cells, preview) in zip(nc_files, results):
+        print(f"\n✅ {nc_file.name}: {n_points:,} pontos")
+        print(f"🔷 Agregado por H3: {n_cells:,} células")
+        print(f"💾 CSV salvo: {out_csv}")
 
     # Amostra de preview
     print("\n🔍 Amostra do CSV gerado:")
-    print(df_h3.head(5).to_string(index=False))
+    print(preview.to_string(index=False))
 
 
 if __name__ == "__main__":
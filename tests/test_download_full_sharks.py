@@ -0,0 +1,34 @@
+import datetime as dt
+import importlib
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def sharks(tmp_path, monkeypatch):
+    # o módulo cria downloads/sharks/... no import → dentro de um diretório temporário
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("download_full_sharks")
+
+
+def test_one_month_drops_days_outside_the_month(sharks, monkeypatch):
+    df = sharks._categorize(pd.DataFrame({
+        "date": ["2024-02-29", "2024-03-01", "2024-03-31", "2024-04-01"],
+        "species": "Sphyrna",
+        "h3": ["85283473fffffff"] * 4,
+        "n_obs": [1, 2, 3, 4],
+        "centroid_lat": 0.0,
+        "centroid_lon": 0.0,
+    }))
+    monkeypatch.setattr(sharks, "fetch_all_species_period", lambda start, end: df)
+
+    by_day = sharks.fetch_all_species_one_month(dt.date(2024, 3, 1), dt.date(2024, 3, 31))
+
+    assert sorted(by_day) == ["2024-03-01", "2024-03-31"]
+    assert by_day["2024-03-01"]["n_obs"].tolist() == [2]
+    assert by_day["2024-03-31"]["n_obs"].tolist() == [3]
@@ -0,0 +1,82 @@
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+TOTALS = {"Carcharhinus": 3500, "Galeocerdo": 1000, "Sphyrna": 2500, "Prionace": 0}
+
+
+def fake_page(sp, geometry, offset):
+    """OBIS falso: 1ª página da 1ª espécie é a mais lenta, uma página falha e região sem dados."""
+    time.sleep(0.05 if (sp == "Carcharhinus" and offset == 0) else 0.001)
+    if sp == "Sphyrna" and offset == 2000:
+        return None
+    total = 0 if "-90" in geometry else TOTALS[sp]
+    n = max(0, min(1000, total - offset))
+    return {"total": total, "results": [
+        {"scientificName": sp, "decimalLatitude": float(offset + k), "decimalLongitude": -1.25,
+         "eventDate": "2020-01-01", **({"basisOfRecord": "H"} if k % 3 else {}), "extra": 1}
+        for k in range(n)
+    ]}
+
+
+@pytest.fixture
+def sharks(tmp_path, monkeypatch):
+    # o módulo cria downloads/sharks no import → dentro de um diretório temporário
+    monkeypatch.chdir(tmp_path)
+    mod = importlib.import_module("download_sharks")
+    monkeypatch.setattr(mod, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(mod, "_fetch_page", fake_page)
+    return mod
+
+
+def _expected(species):
+    rows = []
+    for sp in species:
+        for offset in range(0, TOTALS[sp], 1000):
+            if sp == "Sphyrna" and offset == 2000:
+                continue
+            rows += [(sp, float(offset + k)) for k in range(min(1000, TOTALS[sp] - offset))]
+    return sorted(rows)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_fetch_writes_every_page_once(sharks, monkeypatch, fmt):
+    if fmt == "parquet" and sharks.pa is None:
+        pytest.skip("parquet exige pyarrow")
+    monkeypatch.setattr(sharks, "OUTPUT_FORMAT", fmt)
+    regions = {"americas": [-120, -60, -30, 50], "antarctic": [-180, 180, -90, -50]}
+
+    saved = sharks.fetch_shark_data(regions, list(TOTALS))
+
+    assert list(saved) == list(regions)
+    assert saved["antarctic"] == (None, 0)
+    filename, rows = saved["americas"]
+    df = pd.read_parquet(filename) if fmt == "parquet" else pd.read_csv(filename)
+    assert list(df.columns) == sharks.COLUMNS
+    assert rows == len(df)
+    assert sorted(zip(df["scientificName"], df["decimalLatitude"])) == _expected(TOTALS)
+    assert df["basisOfRecord"].isna().sum() == sum(1 for _, lat in _expected(TOTALS) if int(lat) % 1000 % 3 == 0)
+
+
+def test_fetch_error_cancels_queued_pages(sharks, monkeypatch):
+    if sharks.pa is None:
+        pytest.skip("schema só é validado com pyarrow")
+    calls = []
+
+    def bad_page(sp, geometry, offset):
+        calls.append(offset)
+        time.sleep(0.01)
+        return {"total": 500_000, "results": [{"decimalLatitude": "não é número"}]}
+
+    monkeypatch.setattr(sharks, "_fetch_page", bad_page)
+    monkeypatch.setattr(sharks, "MAX_WORKERS", 2)
+
+    with pytest.raises(Exception):
+        sharks.fetch_shark_data({"americas": [-120, -60, -30, 50]}, ["Sphyrna"])
+    assert len(calls) < 50